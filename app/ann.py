@@ -0,0 +1,233 @@
+# app/ann.py
+"""
+IVF (inverted-file) approximate nearest-neighbour index for L2-normalised
+section embeddings: k-means coarse quantiser, vectors grouped by list and
+stored as float16, search scans only the `nprobe` closest lists.
+
+    index = IVFIndex.build(vectors, keys)
+    keys, scores = index.search(q_vec, k=50, nprobe=8, rows=index.rows_of(corpus_keys))
+    if index.outgrown(): index = index.retrained()   # new lists once it has doubled
+    index.save(path); IVFIndex.save_delta(path, new_vecs, new_keys); IVFIndex.load(path)
+
+    python -m app.ann report [n_vectors] [dim]   # recall@k vs latency against exact search
+"""
+from __future__ import annotations
+import json, os, pathlib, sys, time
+from typing import Dict, Hashable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# ──────────────────────────────────────────────────────────────
+class IVFIndex:
+    """Inner-product search; rows of list l live in vecs[offsets[l]:offsets[l+1]]."""
+
+    def __init__(self, centroids: np.ndarray, dtype=np.float16):
+        self.centroids = np.ascontiguousarray(centroids, dtype=np.float32)
+        self.dtype     = np.dtype(dtype)
+        self.vecs      = np.zeros((0, centroids.shape[1]), dtype=self.dtype)
+        self.offsets   = np.zeros(len(centroids) + 1, dtype=np.int64)
+        self.keys: List[Hashable] = []
+        self.trained_on  = 0                  # rows the centroids were fitted to
+        self.delta_rows  = 0                  # rows loaded from delta files (not in the base file)
+        self._row: Optional[Dict[Hashable, int]] = None
+
+    @property
+    def n_lists(self) -> int:
+        return len(self.centroids)
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    # ── build / add ──────────────────────────────────────────
+    @classmethod
+    def build(
+        cls,
+        vectors : np.ndarray,
+        keys    : Optional[Sequence[Hashable]] = None,
+        n_lists : Optional[int] = None,
+        dtype   = np.float16,
+        train_rows: int = 50_000,
+        seed    : int = 0,
+    ) -> "IVFIndex":
+        """k-means on (a sample of) `vectors` → lists; keys default to row positions."""
+        from sklearn.cluster import KMeans, MiniBatchKMeans
+
+        vectors = np.asarray(vectors, dtype=np.float32)
+        n       = len(vectors)
+        n_lists = n_lists or max(1, min(int(4 * np.sqrt(n)), n))
+        rng     = np.random.default_rng(seed)
+        sample  = vectors[rng.choice(n, size=min(n, train_rows), replace=False)] if n > train_rows else vectors
+        km_cls  = MiniBatchKMeans if len(sample) > 10_000 else KMeans
+        km      = km_cls(n_clusters=n_lists, n_init=1, random_state=seed).fit(sample)
+
+        index = cls(km.cluster_centers_, dtype)
+        index.trained_on = n
+        index.add(vectors, range(n) if keys is None else keys)
+        return index
+
+    def outgrown(self, growth: float = 2.0) -> bool:
+        """More than `growth` × the rows the lists were trained on."""
+        return len(self) > growth * max(self.trained_on, 1)
+
+    def retrained(self) -> "IVFIndex":
+        """Rebuilt over the current rows: new k-means, list count for the current size."""
+        return IVFIndex.build(self.vecs.astype(np.float32), self.keys, dtype=self.dtype)
+
+    def assign(self, vectors: np.ndarray, chunk: int = 8192) -> np.ndarray:
+        """Nearest centroid (max inner product ≈ min L2 for unit vectors) per row."""
+        return np.concatenate([
+            np.argmax(vectors[i:i + chunk] @ self.centroids.T, axis=1)
+            for i in range(0, len(vectors), chunk)
+        ]) if len(vectors) else np.zeros(0, dtype=np.int64)
+
+    def add(self, vectors: np.ndarray, keys: Sequence[Hashable]) -> None:
+        """Append rows; storage is regrouped by list (stable argsort over all rows, so O(n log n) per call)."""
+        vectors = np.asarray(vectors, dtype=np.float32)
+        keys    = list(keys)
+        if len(keys) != len(vectors):
+            raise ValueError("vectors and keys differ in length")
+        lists   = np.concatenate([np.repeat(np.arange(self.n_lists), np.diff(self.offsets)),
+                                  self.assign(vectors)])
+        order   = np.argsort(lists, kind="stable")
+        allvecs = np.concatenate([self.vecs, vectors.astype(self.dtype)])
+        allkeys = self.keys + keys
+        self.vecs = allvecs[order]
+        self.keys = [allkeys[i] for i in order.tolist()]
+        self.offsets = np.zeros(self.n_lists + 1, dtype=np.int64)
+        np.cumsum(np.bincount(lists, minlength=self.n_lists), out=self.offsets[1:])
+        self._row = None
+
+    def rows_of(self, keys: Sequence[Hashable]) -> np.ndarray:
+        """Storage row per key, -1 for keys not in the index."""
+        if self._row is None:
+            self._row = {k: i for i, k in enumerate(self.keys)}
+        return np.fromiter((self._row.get(k, -1) for k in keys), dtype=np.int64, count=len(keys))
+
+    # ── search ───────────────────────────────────────────────
+    def search(self, query: np.ndarray, k: int = 50, nprobe: int = 8,
+               rows: Optional[np.ndarray] = None) -> Tuple[List[Hashable], np.ndarray]:
+        """Top-k (keys, inner products) among the `nprobe` lists closest to `query`.
+        `rows` (from rows_of(), -1 ignored) restricts the search to those rows:
+        only lists holding one of them are probed, and only they are scored."""
+        query  = np.asarray(query, dtype=np.float32)
+        coarse = self.centroids @ query
+        lists  = np.arange(self.n_lists)
+        allowed = None
+        if rows is not None:
+            allowed = np.zeros(len(self), dtype=bool)
+            allowed[rows[rows >= 0]] = True
+            seen    = np.concatenate([[0], np.cumsum(allowed)])
+            lists   = np.flatnonzero(seen[self.offsets[1:]] > seen[self.offsets[:-1]])
+        nprobe = min(nprobe, len(lists))
+        if nprobe == 0:
+            return [], np.zeros(0, dtype=np.float32)
+        probe = lists[np.argpartition(-coarse[lists], nprobe - 1)[:nprobe]] if nprobe < len(lists) else lists
+        cand  = np.concatenate([np.arange(self.offsets[l], self.offsets[l + 1]) for l in probe])
+        if allowed is not None:
+            cand = cand[allowed[cand]]
+        if not len(cand):
+            return [], np.zeros(0, dtype=np.float32)
+        scores = self.vecs[cand].astype(np.float32) @ query
+        k      = min(k, len(cand))
+        top    = np.argpartition(-scores, k - 1)[:k]
+        top    = top[np.argsort(-scores[top], kind="stable")]
+        return [self.keys[i] for i in cand[top].tolist()], scores[top]
+
+    # ── persistence ──────────────────────────────────────────
+    # <path> holds the lists and every row at the last full save; rows added since
+    # go to <path>.delta/ (one small file per save_delta()) and are re-added on load.
+    def save(self, path: str | pathlib.Path) -> None:
+        """Full rewrite; delta files are removed (rows another process appended in the
+        meantime are lost from the file and re-added when next seen)."""
+        path = pathlib.Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(path.name + f".{os.getpid()}.tmp")
+        with open(tmp, "wb") as fh:
+            np.savez(fh, centroids=self.centroids, vecs=self.vecs, offsets=self.offsets,
+                     keys=np.array(json.dumps(self.keys)), trained_on=np.int64(self.trained_on))
+        os.replace(tmp, path)
+        for f in _delta_files(path):
+            f.unlink(missing_ok=True)
+        self.delta_rows = 0
+
+    @staticmethod
+    def save_delta(path: str | pathlib.Path, vectors: np.ndarray, keys: Sequence[Hashable],
+                   dtype=np.float16) -> None:
+        """Append rows to the saved index without rewriting it."""
+        d = pathlib.Path(str(path) + ".delta")
+        d.mkdir(parents=True, exist_ok=True)
+        tmp = d / f".{os.getpid()}.tmp"
+        with open(tmp, "wb") as fh:
+            np.savez(fh, vecs=np.asarray(vectors, dtype=dtype), keys=np.array(json.dumps(list(keys))))
+        os.replace(tmp, d / f"{time.time_ns():020d}-{os.getpid()}.npz")
+
+    @classmethod
+    def load(cls, path: str | pathlib.Path) -> "IVFIndex":
+        with np.load(path, allow_pickle=False) as z:
+            index = cls(z["centroids"], z["vecs"].dtype)
+            index.vecs    = z["vecs"]
+            index.offsets = z["offsets"]
+            index.keys    = _keys(z)
+            index.trained_on = int(z["trained_on"]) if "trained_on" in z.files else len(index.keys)
+        for f in _delta_files(path):
+            with np.load(f, allow_pickle=False) as z:
+                keys = _keys(z)
+                if index._row is None:
+                    index._row = {k: i for i, k in enumerate(index.keys)}
+                new  = [i for i, k in enumerate(keys) if k not in index._row]   # another process saved it too
+                index.add(z["vecs"][new], [keys[i] for i in new])
+                index.delta_rows += len(new)
+        return index
+
+def _keys(z) -> List[Hashable]:
+    return [k if not isinstance(k, list) else tuple(k) for k in json.loads(str(z["keys"]))]
+
+def _delta_files(path: str | pathlib.Path) -> List[pathlib.Path]:
+    return sorted(pathlib.Path(str(path) + ".delta").glob("*.npz"))
+
+# ──────────────────────────────────────────────────────────────
+def _synth_vectors(n: int, dim: int, n_topics: int = 200, seed: int = 0) -> np.ndarray:
+    """Unit vectors around random topic centres (embedding-like clustered data)."""
+    rng    = np.random.default_rng(seed)
+    topics = rng.standard_normal((n_topics, dim)).astype(np.float32)
+    vecs   = topics[rng.integers(0, n_topics, n)] + 0.9 * rng.standard_normal((n, dim)).astype(np.float32)
+    return vecs / np.linalg.norm(vecs, axis=1, keepdims=True)
+
+def recall_report(
+    vectors : np.ndarray,
+    queries : np.ndarray,
+    k       : int = 10,
+    nprobes : Sequence[int] = (1, 2, 4, 8, 16, 32, 64),
+) -> dict:
+    """recall@k and ms/query per nprobe, against exact float32 search."""
+    t0    = time.perf_counter()
+    index = IVFIndex.build(vectors)
+    build = time.perf_counter() - t0
+
+    t0    = time.perf_counter()
+    exact = [set(np.argpartition(-(vectors @ q), k - 1)[:k].tolist()) for q in queries]
+    exact_ms = (time.perf_counter() - t0) / len(queries) * 1e3
+
+    report = {"vectors": len(vectors), "dim": vectors.shape[1], "lists": index.n_lists,
+              "build_sec": round(build, 2), "exact_ms": round(exact_ms, 3), "ivf": {}}
+    for nprobe in nprobes:
+        if nprobe > index.n_lists:
+            break
+        t0   = time.perf_counter()
+        hits = [index.search(q, k, nprobe)[0] for q in queries]
+        ms   = (time.perf_counter() - t0) / len(queries) * 1e3
+        recall = np.mean([len(exact[i] & set(h)) / k for i, h in enumerate(hits)])
+        report["ivf"][nprobe] = {"recall": round(float(recall), 4), "ms": round(ms, 3)}
+    return report
+
+def main():
+    if len(sys.argv) < 2 or sys.argv[1] != "report":
+        print("Usage: python -m app.ann report [n_vectors] [dim]")
+        sys.exit(2)
+    n   = int(sys.argv[2]) if len(sys.argv) > 2 else 100_000
+    dim = int(sys.argv[3]) if len(sys.argv) > 3 else 384
+    data = _synth_vectors(n + 200, dim)
+    print(json.dumps(recall_report(data[:n], data[n:]), indent=2))
+
+if __name__ == "__main__":
+    main()
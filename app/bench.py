@@ -0,0 +1,239 @@
+# app/bench.py
+"""
+End-to-end benchmark over synthetic corpora (perf.synth_pdf): every stage from
+PDF parsing to the written result, one fresh process per scenario so peak RSS
+is per scenario.
+
+    python -m app.bench run [--out bench.json] [--quick] [--only a,b] [--repeat n]
+    python -m app.bench compare baseline.json [current.json] [--threshold 0.15]
+
+Stages: parse · features · levels · extract (whole outline + sections, cache
+off) · model_load · rank (rank_sections) · refine (refine_sections) · output
+(result.json + result.ndjson). Each records wall_sec (best of --repeat),
+peak_rss_mb after the stage, and pages/s or sections/s. Without a loadable
+encoder the model stages are recorded as skipped.
+
+compare re-runs the baseline's scenarios unless a current.json is given and
+exits 1 when a stage got slower / heavier (or throughput dropped) by more than
+--threshold.
+"""
+from __future__ import annotations
+import argparse, json, os, pathlib, platform, resource, sys, tempfile, time
+import multiprocessing as mp
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, List, Optional
+
+from .config        import Config
+from .section_store import SectionStore
+
+SCENARIOS: Dict[str, dict] = {
+    "latin-20p"      : dict(pages=20),
+    "latin-200p"     : dict(pages=200),
+    "latin-600p"     : dict(pages=600),
+    "dense-headings" : dict(pages=50, headings=6),
+    "sparse-headings": dict(pages=50, headings=0.2),
+    "two-column"     : dict(pages=50, headings=2, columns=2),
+    "three-column"   : dict(pages=50, headings=3, columns=3),
+    "arabic"         : dict(pages=40, headings=2, script="arabic"),
+    "devanagari"     : dict(pages=40, headings=2, script="devanagari"),
+    "cjk"            : dict(pages=40, headings=2, script="cjk"),
+}
+QUICK = ("latin-20p", "dense-headings", "two-column", "arabic")
+
+PERSONA = {"role": "Investment Analyst", "expertise": "market research",
+           "focus_areas": ["revenue growth", "risk", "strategy"]}
+JOB     = "Summarise revenue growth strategy and investment risk across the reports"
+
+# metric → +1 higher is worse, -1 lower is worse
+_DIRECTION = {"wall_sec": +1, "peak_rss_mb": +1, "pages_per_sec": -1, "sections_per_sec": -1}
+_MIN_SEC   = 0.02                        # stages this short on both sides: timing is noise
+_SUBSTAGES = ("parse", "features", "levels")
+
+# ──────────────────────────────────────────────────────────────
+def _rss_mb() -> float:
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)   # KiB on Linux
+
+def _timed(fn: Callable, repeat: int):
+    """(result of the last call, best wall time)."""
+    best = float("inf")
+    for _ in range(repeat):
+        t0  = time.perf_counter()
+        out = fn()
+        best = min(best, time.perf_counter() - t0)
+    return out, best
+
+def _stage(wall: float, pages: int = 0, sections: int = 0) -> dict:
+    rec = {"wall_sec": round(wall, 4), "peak_rss_mb": _rss_mb()}
+    if pages:
+        rec["pages_per_sec"] = round(pages / wall, 1) if wall else None
+    if sections:
+        rec["sections_per_sec"] = round(sections / wall, 1) if wall else None
+    return rec
+
+def run_scenario(pdf: str, repeat: int = 1) -> dict:
+    """All stages over one PDF, in the calling process (run_all() gives it a fresh one)."""
+    from .pdf_loader   import load_lines
+    from .features     import compute_features
+    from .level_assign import assign_levels
+    from .extract_outline_and_sections import _extract_sections
+
+    stages: Dict[str, dict] = {}
+    path = pathlib.Path(pdf)
+
+    (lines, pages), dt = _timed(lambda: load_lines(str(path)), repeat)
+    stages["parse"] = _stage(dt, pages=pages)
+
+    feats, dt = _timed(lambda: compute_features(lines, pages), repeat)
+    cands = [f | {"y0": f.get("y0", 0.0)} for f in feats.candidates()]
+    stages["features"] = _stage(dt, pages=pages)
+
+    _, dt = _timed(lambda: assign_levels(cands, pages), repeat)
+    stages["levels"] = _stage(dt, pages=pages)
+    del lines, feats
+
+    sections, dt = _timed(lambda: _extract_sections(path, "doc1"), repeat)
+    stages["extract"] = _stage(dt, pages=pages)
+
+    out = {"pages": pages, "candidates": len(cands), "sections": len(sections), "stages": stages}
+    if sections:
+        _bench_model_stages(SectionStore.from_documents([("doc1", path.name, sections)]),
+                            stages, repeat)
+
+    # parse / features / levels are sub-steps of extract
+    timed = [s["wall_sec"] for k, s in stages.items() if "wall_sec" in s and k not in _SUBSTAGES]
+    out["total"] = _stage(sum(timed), pages=pages, sections=len(sections))
+    return out
+
+def _bench_model_stages(sections: SectionStore, stages: Dict[str, dict], repeat: int) -> None:
+    from .encoder  import get_encoder
+    from .output   import NDJSONWriter, write_json
+    from .pipeline import _result_json
+    from .ranker   import build_query, rank_sections
+    from .paragraph_summarize import refine_sections
+
+    t0 = time.perf_counter()
+    try:
+        get_encoder()
+    except Exception as exc:             # no weights / backend here: outline stages only
+        for name in ("model_load", "rank", "refine", "output"):
+            stages[name] = {"skipped": f"{type(exc).__name__}: {exc}"[:200]}
+        return
+    stages["model_load"] = _stage(time.perf_counter() - t0)
+
+    n = len(sections)
+    (top, ids), dt = _timed(lambda: rank_sections(sections, PERSONA, JOB, keep_top=15), repeat)
+    stages["rank"] = _stage(dt, sections=n)
+
+    origins, query = [sections[i] for i in ids], build_query(PERSONA, JOB)
+    refined, dt = _timed(lambda: refine_sections(origins, query), repeat)
+    stages["refine"] = _stage(dt, sections=len(origins))
+
+    result = _result_json(sections, PERSONA, JOB, top, [r for r in refined if r])
+    with tempfile.TemporaryDirectory(prefix="bench-out-") as tmp:
+        def _write():
+            write_json(pathlib.Path(tmp) / "result.json", result)
+            NDJSONWriter(pathlib.Path(tmp) / "result.ndjson", [pathlib.Path("bench.pdf")]).write_result(result)
+        _, dt = _timed(_write, repeat)
+    stages["output"] = _stage(dt, sections=len(top))
+
+# ──────────────────────────────────────────────────────────────
+def _scenario_child(name: str, spec: dict, repeat: int) -> dict:
+    from .perf import synth_pdf
+    with tempfile.TemporaryDirectory(prefix="bench-") as tmp:
+        pdf = os.path.join(tmp, f"{name}.pdf")
+        try:
+            synth_pdf(pdf, **spec)
+        except FileNotFoundError as exc:   # script font missing
+            return {"skipped": str(exc)}
+        return run_scenario(pdf, repeat)
+
+def run_all(specs: Dict[str, dict], repeat: int = 1) -> dict:
+    out = {
+        "meta": {
+            "timestamp"      : time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "python"         : platform.python_version(),
+            "machine"        : platform.machine(),
+            "cpus"           : os.cpu_count(),
+            "encoder_backend": Config.ENCODER_BACKEND,
+            "repeat"         : repeat,
+        },
+        "scenarios": {},
+    }
+    for name, spec in specs.items():
+        print(f"[bench] {name} {spec}", file=sys.stderr)
+        with ProcessPoolExecutor(max_workers=1, mp_context=mp.get_context("spawn")) as ex:
+            res = ex.submit(_scenario_child, name, spec, repeat).result()
+        out["scenarios"][name] = {"spec": spec, **res}
+    return out
+
+# ──────────────────────────────────────────────────────────────
+def compare(base: dict, cur: dict, threshold: float = 0.15) -> List[dict]:
+    """Per scenario / stage / metric changes beyond `threshold`; regressions carry regression=True."""
+    changes = []
+    for name, b_scn in base["scenarios"].items():
+        c_scn = cur["scenarios"].get(name)
+        if c_scn is None or "stages" not in b_scn or "stages" not in c_scn:
+            continue
+        b_stages = {**b_scn["stages"], "total": b_scn.get("total", {})}
+        c_stages = {**c_scn["stages"], "total": c_scn.get("total", {})}
+        for stage, b_rec in b_stages.items():
+            c_rec = c_stages.get(stage, {})
+            tiny  = max(b_rec.get("wall_sec", 0), c_rec.get("wall_sec", 0)) < _MIN_SEC
+            for metric, sign in _DIRECTION.items():
+                old, new = b_rec.get(metric), c_rec.get(metric)
+                if not old or new is None or (tiny and metric != "peak_rss_mb"):
+                    continue
+                delta = (new - old) / old
+                if abs(delta) > threshold:
+                    changes.append({"scenario": name, "stage": stage, "metric": metric,
+                                    "old": old, "new": new, "change": round(delta, 3),
+                                    "regression": delta * sign > 0})
+    return changes
+
+def _print_changes(changes: List[dict], threshold: float) -> None:
+    regs = [c for c in changes if c["regression"]]
+    for c in changes:
+        mark = "✗" if c["regression"] else "✓"
+        print(f"{mark} {c['scenario']:<16} {c['stage']:<11} {c['metric']:<16} "
+              f"{c['old']:>10.4g} → {c['new']:<10.4g} ({c['change']:+.1%})")
+    print(f"{len(regs)} regression(s), {len(changes) - len(regs)} improvement(s) beyond ±{threshold:.0%}")
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap  = argparse.ArgumentParser(prog="python -m app.bench", description="Round-1B end-to-end benchmark")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    run = sub.add_parser("run", help="benchmark the scenarios, write a JSON baseline")
+    run.add_argument("--out", default="bench.json")
+    run.add_argument("--quick", action="store_true", help=f"only {', '.join(QUICK)}")
+    run.add_argument("--only", help="comma-separated scenario names")
+    run.add_argument("--repeat", type=int, default=1)
+    cmp = sub.add_parser("compare", help="flag regressions against a baseline")
+    cmp.add_argument("baseline")
+    cmp.add_argument("current", nargs="?", help="previous `run` output (default: run now)")
+    cmp.add_argument("--threshold", type=float, default=0.15)
+    cmp.add_argument("--out", help="also save the fresh run here")
+    args = ap.parse_args(argv)
+
+    if args.cmd == "run":
+        names = args.only.split(",") if args.only else list(QUICK if args.quick else SCENARIOS)
+        unknown = [n for n in names if n not in SCENARIOS]
+        if unknown:
+            ap.error(f"unknown scenario(s) {unknown}; choose from {list(SCENARIOS)}")
+        res = run_all({n: SCENARIOS[n] for n in names}, args.repeat)
+        pathlib.Path(args.out).write_text(json.dumps(res, indent=2, ensure_ascii=False), encoding="utf-8")
+        print(json.dumps({n: s.get("total", s) for n, s in res["scenarios"].items()}, indent=2))
+        return 0
+
+    base = json.loads(pathlib.Path(args.baseline).read_text(encoding="utf-8"))
+    if args.current:
+        cur = json.loads(pathlib.Path(args.current).read_text(encoding="utf-8"))
+    else:
+        specs = {n: s["spec"] for n, s in base["scenarios"].items()}   # same corpora as the baseline
+        cur   = run_all(specs, base["meta"].get("repeat", 1))
+        if args.out:
+            pathlib.Path(args.out).write_text(json.dumps(cur, indent=2, ensure_ascii=False), encoding="utf-8")
+    changes = compare(base, cur, args.threshold)
+    _print_changes(changes, args.threshold)
+    return 1 if any(c["regression"] for c in changes) else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
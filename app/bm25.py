@@ -0,0 +1,379 @@
+# app/bm25.py
+"""
+Okapi BM25 over a term → document inverted index (CSR arrays).
+
+Scores are bit-identical to rank_bm25.BM25Okapi (k1=1.5, b=0.75, ε=0.25 floor
+on negative idf) for an index built in one go.
+
+    index = BM25Index.from_texts(texts)            # keys 0 … n-1
+    index.add("k", text); index.remove("k")       # incremental (pending delta segment)
+    index.get_scores(query, keys)                 # touches query postings only (~0.8 ms at 100k docs)
+    index.save(path); BM25Index.load(path)
+
+    python -m app.bm25 check [n_docs]   # parity vs rank_bm25 + scoring latency
+"""
+from __future__ import annotations
+import json, math, os, pathlib, re, sys, time
+from typing import Callable, Dict, Hashable, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .config     import Config
+from .text_utils import normalize_all_digits
+
+# ───────────────────────────── tokenizers ─────────────────────────────────────
+Tokenizer = Callable[[str], List[str]]
+
+def whitespace_tokens(text: str) -> List[str]:
+    """The original ranker tokenisation: lower-case, split on whitespace."""
+    return text.lower().split()
+
+_SPLIT_RE    = re.compile(r'[^\s!-/:-@\[-`{-~，。、；：？！「」『』（）《》【】“”‘’…·،؛؟।॥]+')
+_AR_MARKS_RE = re.compile(r'[ً-ٰٟـ]')       # harakat + tatweel
+_CJK_RUN_RE  = re.compile(r'[぀-ヿ㐀-䶿一-鿿豈-﫿가-힯]+')
+
+def multilingual_tokens(text: str) -> List[str]:
+    """Split on whitespace + punctuation, drop Arabic diacritics, CJK runs → character bigrams."""
+    text = _AR_MARKS_RE.sub("", normalize_all_digits(text).lower())
+    out: List[str] = []
+    for tok in _SPLIT_RE.findall(text):
+        pos = 0
+        for m in _CJK_RUN_RE.finditer(tok):
+            if m.start() > pos:
+                out.append(tok[pos:m.start()])
+            run = m.group()
+            out.extend([run] if len(run) == 1 else [run[i:i + 2] for i in range(len(run) - 1)])
+            pos = m.end()
+        if pos < len(tok):
+            out.append(tok[pos:])
+    return out
+
+TOKENIZERS: Dict[str, Tokenizer] = {
+    "whitespace":   whitespace_tokens,
+    "multilingual": multilingual_tokens,
+}
+
+def register_tokenizer(name: str, fn: Tokenizer) -> None:
+    TOKENIZERS[name] = fn
+
+def get_tokenizer(name: str) -> Tokenizer:
+    try:
+        return TOKENIZERS[name]
+    except KeyError:
+        raise ValueError(f"unknown BM25 tokenizer {name!r} (expected one of {sorted(TOKENIZERS)})") from None
+
+# ───────────────────────────── index ──────────────────────────────────────────
+_DENSE_SHARE = 8          # a term in ≥ 1/8 of the slots is scored from a dense weight row …
+_DENSE_ROWS  = 64         # … of which at most this many are kept (8 bytes per slot each)
+
+class BM25Index:
+    """
+    Postings live in CSR form (indptr over term ids, doc slots + term counts);
+    add() goes to a pending delta that is merged on the next query, remove()
+    tombstones a slot. Corpus statistics and per-posting weights are
+    recomputed lazily once per change, so repeated queries only touch the
+    postings of their own terms; the weights of very common terms are also
+    kept as dense rows, added whole instead of scattered posting by posting.
+    """
+
+    def __init__(self, tokenizer: Optional[str] = None, k1: float = 1.5, b: float = 0.75, epsilon: float = 0.25):
+        self.tokenizer_name = tokenizer or Config.BM25_TOKENIZER
+        self.tokenize       = get_tokenizer(self.tokenizer_name)
+        self.k1, self.b, self.epsilon = k1, b, epsilon
+
+        self._terms:  List[str]          = []
+        self._vocab:  Dict[str, int]     = {}
+        self._keys:   List[Optional[Hashable]] = []     # slot → key (None once removed)
+        self._slot:   Dict[Hashable, int] = {}
+        self._doc_len = np.zeros(0, dtype=np.int64)
+        self._alive   = np.zeros(0, dtype=bool)
+        self._indptr  = np.zeros(1, dtype=np.int64)
+        self._indices = np.zeros(0, dtype=np.int32)     # doc slot per posting
+        self._tf      = np.zeros(0, dtype=np.int32)     # term count per posting
+
+        self._pending: Tuple[List[int], List[int], List[int]] = ([], [], [])   # term, slot, tf
+        self._pending_len:  List[int] = []
+        self._pending_keys: List[Optional[Hashable]] = []
+        self._dirty = True
+        self._idf    = np.zeros(0)
+        self._weight = np.zeros(0)                      # idf · tf·(k1+1) / (tf + k1·(1-b+b·dl/avgdl))
+        self._rows: Dict[int, np.ndarray] = {}          # term → weight per slot (common terms)
+        self._positional: Optional[bool] = None         # every live key equals its slot
+
+    # ── construction ─────────────────────────────────────────────────────────
+    @classmethod
+    def from_texts(cls, texts: Iterable[str], tokenizer: Optional[str] = None, **params) -> "BM25Index":
+        index = cls(tokenizer, **params)
+        index.add_many(enumerate(texts))
+        return index
+
+    def add(self, key: Hashable, text: str) -> None:
+        self.add_many([(key, text)])
+
+    def add_many(self, items: Iterable[Tuple[Hashable, str]]) -> None:
+        """Index (key, text) pairs; an existing key is replaced."""
+        p_term, p_slot, p_tf = self._pending
+        for key, text in items:
+            if key in self._slot:
+                self.remove(key)
+            slot = len(self._keys) + len(self._pending_len)
+            self._slot[key] = slot
+            self._pending_keys.append(key)
+            counts: Dict[int, int] = {}
+            tokens = self.tokenize(text)
+            for tok in tokens:
+                t = self._vocab.get(tok)
+                if t is None:
+                    t = self._vocab[tok] = len(self._terms)
+                    self._terms.append(tok)
+                counts[t] = counts.get(t, 0) + 1
+            p_term.extend(counts)
+            p_slot.extend([slot] * len(counts))
+            p_tf.extend(counts.values())
+            self._pending_len.append(len(tokens))
+        self._dirty = True
+
+    def remove(self, key: Hashable) -> bool:
+        slot = self._slot.pop(key, None)
+        if slot is None:
+            return False
+        if slot < len(self._keys):
+            self._keys[slot] = None
+            self._alive[slot] = False
+        else:                                           # still in the pending delta
+            self._pending_keys[slot - len(self._keys)] = None
+        self._dirty = True
+        return True
+
+    def __len__(self) -> int:
+        return len(self._slot)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._slot
+
+    @property
+    def keys(self) -> List[Hashable]:
+        """Live keys in slot order (the order of get_scores(query))."""
+        self._refresh()
+        return [k for k in self._keys if k is not None]
+
+    # ── maintenance ──────────────────────────────────────────────────────────
+    def _merge_pending(self) -> None:
+        """Fold the delta segment into the CSR arrays (vectorised, O(nnz + d log d))."""
+        if not self._pending_len:
+            return
+        p_term, p_slot, p_tf = (np.asarray(a, dtype=np.int64) for a in self._pending)
+        order = np.argsort(p_term, kind="stable")
+        p_term, p_slot, p_tf = p_term[order], p_slot[order], p_tf[order]
+
+        n_terms = len(self._terms)
+        old_cnt = np.zeros(n_terms, dtype=np.int64)
+        old_cnt[: len(self._indptr) - 1] = np.diff(self._indptr)
+        new_cnt = np.bincount(p_term, minlength=n_terms)
+        indptr  = np.zeros(n_terms + 1, dtype=np.int64)
+        np.cumsum(old_cnt + new_cnt, out=indptr[1:])
+
+        indices = np.empty(indptr[-1], dtype=np.int32)
+        tf      = np.empty(indptr[-1], dtype=np.int32)
+        if len(self._indices):
+            old_term = np.repeat(np.arange(n_terms), old_cnt)
+            old_pos  = indptr[old_term] + np.arange(len(self._indices)) - self._indptr[old_term]
+            indices[old_pos], tf[old_pos] = self._indices, self._tf
+        rank    = np.arange(len(p_term)) - np.searchsorted(p_term, p_term, side="left")
+        new_pos = indptr[p_term] + old_cnt[p_term] + rank
+        indices[new_pos], tf[new_pos] = p_slot, p_tf
+
+        new_keys = self._pending_keys
+        self._indptr, self._indices, self._tf = indptr, indices, tf
+        self._keys.extend(new_keys)
+        self._alive   = np.concatenate([self._alive, np.array([k is not None for k in new_keys], dtype=bool)])
+        self._doc_len = np.concatenate([self._doc_len, np.asarray(self._pending_len, dtype=np.int64)])
+        self._pending, self._pending_len, self._pending_keys = ([], [], []), [], []
+
+    def compact(self) -> None:
+        """Drop removed slots and their postings (slots are renumbered)."""
+        self._merge_pending()
+        if self._alive.all():
+            return
+        remap   = np.cumsum(self._alive) - 1
+        term_of = np.repeat(np.arange(len(self._terms)), np.diff(self._indptr))
+        keep    = self._alive[self._indices]
+        self._indices = remap[self._indices[keep]].astype(np.int32)
+        self._tf      = self._tf[keep]
+        self._indptr  = np.zeros(len(self._terms) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(term_of[keep], minlength=len(self._terms)), out=self._indptr[1:])
+        self._keys    = [k for k in self._keys if k is not None]
+        self._slot    = {k: i for i, k in enumerate(self._keys)}
+        self._doc_len = self._doc_len[self._alive]
+        self._alive   = np.ones(len(self._keys), dtype=bool)
+        self._dirty   = True
+
+    def _refresh(self) -> None:
+        if not self._dirty:
+            return
+        self._merge_pending()
+        if len(self._alive) and (~self._alive).sum() * 2 > len(self._alive):
+            self.compact()
+
+        n_docs  = int(self._alive.sum())
+        n_terms = len(self._terms)
+        self._idf    = np.zeros(n_terms)
+        self._weight = np.zeros(len(self._indices))
+        self._rows   = {}
+        self._positional = None
+        self._dirty  = False
+        if n_docs == 0:
+            return
+
+        # document frequencies over live slots
+        term_of = np.repeat(np.arange(n_terms), np.diff(self._indptr))
+        live    = self._alive[self._indices]
+        df      = np.bincount(term_of[live], minlength=n_terms)
+        if not df.any():
+            return
+
+        # idf in first-seen term order with math.log, exactly as BM25Okapi._calc_idf
+        idf = self._idf
+        idf_sum, negative = 0.0, []
+        for t in np.flatnonzero(df).tolist():
+            f = int(df[t])
+            v = math.log(n_docs - f + 0.5) - math.log(f + 0.5)
+            idf[t] = v
+            idf_sum += v
+            if v < 0:
+                negative.append(t)
+        idf[negative] = self.epsilon * (idf_sum / int(np.count_nonzero(df)))
+
+        avgdl = int(self._doc_len[self._alive].sum()) / n_docs
+        norm  = self.k1 * (1 - self.b + self.b * self._doc_len / avgdl)
+        tf    = self._tf.astype(np.int64)
+        self._weight = tf * (self.k1 + 1) / (tf + norm[self._indices])
+        self._weight *= np.repeat(idf, np.diff(self._indptr))
+        self._weight[~live] = 0.0
+
+    # ── scoring ──────────────────────────────────────────────────────────────
+    def _slot_scores(self, query: str) -> np.ndarray:
+        """Summed term by term in query order (as rank_bm25 does), so scores stay bit-identical."""
+        self._refresh()
+        n      = len(self._keys)
+        scores = np.zeros(n)
+        for tok in self.tokenize(query):                # repeated query terms count repeatedly
+            t = self._vocab.get(tok)
+            if t is None or t >= len(self._idf):
+                continue
+            lo, hi = self._indptr[t], self._indptr[t + 1]
+            row = self._rows.get(t)
+            if row is None and (hi - lo) * _DENSE_SHARE >= n and len(self._rows) < _DENSE_ROWS:
+                row = self._rows[t] = np.zeros(n)
+                row[self._indices[lo:hi]] = self._weight[lo:hi]
+            if row is not None:
+                scores += row
+            elif hi > lo:                               # a term's slots are unique
+                scores[self._indices[lo:hi]] += self._weight[lo:hi]
+        return scores
+
+    def get_scores(self, query: str, keys: Optional[Sequence[Hashable]] = None) -> np.ndarray:
+        """BM25 score per key (default: self.keys order); unknown keys score 0."""
+        scores = self._slot_scores(query)
+        if keys is None:
+            return scores if self._alive.all() else scores[self._alive]
+        if isinstance(keys, range) and keys == range(len(self._keys)) and self._is_positional() \
+                and self._alive.all():
+            return scores                               # from_texts() index, scored in full
+        slots = self._key_slots(keys)
+        return np.where(slots >= 0, scores[slots], 0.0)
+
+    def _is_positional(self) -> bool:
+        """Every live key equals its slot (keys 0 … n-1 from from_texts(), nothing re-added)."""
+        if self._positional is None:
+            self._positional = all(k is None or k == i for i, k in enumerate(self._keys))
+        return self._positional
+
+    def _key_slots(self, keys: Sequence[Hashable]) -> np.ndarray:
+        """Slot per key, -1 if unknown; a range over a from_texts() index maps without lookups."""
+        if isinstance(keys, range) and self._is_positional():
+            slots = np.arange(keys.start, keys.stop, keys.step, dtype=np.int64)
+            ok    = (slots >= 0) & (slots < len(self._keys))
+            ok[ok] = self._alive[slots[ok]]
+            return np.where(ok, slots, -1)
+        return np.fromiter((self._slot.get(k, -1) for k in keys), dtype=np.int64, count=len(keys))
+
+    # ── persistence ──────────────────────────────────────────────────────────
+    def save(self, path: str | pathlib.Path) -> None:
+        """Write the compacted index to one .npz file (atomic replace)."""
+        self.compact()
+        path = pathlib.Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        meta = {"tokenizer": self.tokenizer_name, "k1": self.k1, "b": self.b,
+                "epsilon": self.epsilon, "keys": self._keys}
+        tmp = path.with_name(path.name + f".{os.getpid()}.tmp")
+        with open(tmp, "wb") as fh:
+            np.savez(fh, meta=np.array(json.dumps(meta)), terms=np.array(self._terms, dtype=str),
+                     indptr=self._indptr, indices=self._indices, tf=self._tf, doc_len=self._doc_len)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str | pathlib.Path) -> "BM25Index":
+        with np.load(path, allow_pickle=False) as z:
+            meta  = json.loads(str(z["meta"]))
+            index = cls(meta["tokenizer"], meta["k1"], meta["b"], meta["epsilon"])
+            index._terms   = z["terms"].tolist()
+            index._indptr  = z["indptr"]
+            index._indices = z["indices"]
+            index._tf      = z["tf"]
+            index._doc_len = z["doc_len"]
+        index._vocab = {t: i for i, t in enumerate(index._terms)}
+        index._keys  = [k if not isinstance(k, list) else tuple(k) for k in meta["keys"]]
+        index._slot  = {k: i for i, k in enumerate(index._keys)}
+        index._alive = np.ones(len(index._keys), dtype=bool)
+        return index
+
+# ───────────────────────────── parity check ───────────────────────────────────
+def _synth_corpus(n_docs: int, vocab: int = 20_000, seed: int = 0) -> List[str]:
+    rng   = np.random.default_rng(seed)
+    words = [f"w{i}" for i in range(vocab)]
+    ranks = rng.zipf(1.3, size=n_docs * 60) % vocab       # Zipfian term frequencies
+    lens  = rng.integers(5, 120, size=n_docs)
+    out, pos = [], 0
+    for n in lens.tolist():
+        out.append(" ".join(words[r] for r in ranks[pos:pos + n].tolist()))
+        pos = (pos + n) % (len(ranks) - 120)
+    return out
+
+def check(n_docs: int = 100_000, n_queries: int = 50) -> dict:
+    texts   = _synth_corpus(n_docs)
+    queries = [" ".join(texts[i].split()[:12]) for i in range(0, n_docs, max(n_docs // n_queries, 1))][:n_queries]
+
+    t0 = time.perf_counter()
+    index = BM25Index.from_texts(texts, "whitespace")
+    index.get_scores(queries[0])                         # first query pays the lazy refresh
+    build = time.perf_counter() - t0
+    per_query = []
+    for _ in range(2):                                   # first pass also builds dense rows
+        t0 = time.perf_counter()
+        for q in queries:
+            index.get_scores(q, range(n_docs))
+        per_query.append((time.perf_counter() - t0) / len(queries))
+
+    touched = np.mean([sum(int(np.diff(index._indptr[[index._vocab[w], index._vocab[w] + 1]])[0])
+                           for w in q.split()) for q in queries])
+    report = {"docs": n_docs, "terms": len(index._terms), "postings": int(len(index._indices)),
+              "build_sec": round(build, 3), "query_ms_first": round(per_query[0] * 1e3, 3),
+              "query_ms": round(per_query[1] * 1e3, 3),
+              "postings_per_query": int(touched)}
+    try:
+        from rank_bm25 import BM25Okapi
+    except ImportError:
+        return report
+    sub  = texts[: min(n_docs, 5_000)]
+    ref  = BM25Okapi([t.lower().split() for t in sub])
+    mine = BM25Index.from_texts(sub, "whitespace")
+    report["identical_to_rank_bm25"] = all(
+        np.array_equal(ref.get_scores(q.lower().split()), mine.get_scores(q)) for q in queries)
+    return report
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2 or sys.argv[1] != "check":
+        print("Usage: python -m app.bm25 check [n_docs]")
+        sys.exit(2)
+    print(json.dumps(check(*(int(a) for a in sys.argv[2:3])), indent=2))
@@ -33,3 +33,90 @@ Config.INCLUDE_DEBUG = (os.getenv("DEBUG") == "1")
 # Runtime flag (default off) – set DEBUG=1 environment variable to include debug keys.
 import os
 Config.INCLUDE_DEBUG = (os.getenv("DEBUG") == "1")
+
+# Runtime flags – WORKERS=<n> extracts input PDFs in an n-process pool;
+# WORKER_THREADS caps torch / BLAS threads inside each worker.
+Config.EXTRACT_WORKERS = int(os.getenv("WORKERS", "1"))
+Config.WORKER_THREADS  = int(os.getenv("WORKER_THREADS", "1"))
+
+# Runtime flags – SHARD_WORKERS=<n> parses a single PDF longer than SHARD_PAGES
+# pages in page-range shards across n processes.
+Config.SHARD_WORKERS = int(os.getenv("SHARD_WORKERS", "1"))
+Config.SHARD_PAGES   = int(os.getenv("SHARD_PAGES", "200"))
+
+# Runtime flags – SECTION_CACHE_DIR=<dir> enables the on-disk section cache,
+# bounded to SECTION_CACHE_MB of payload (LRU eviction).
+Config.SECTION_CACHE_DIR = os.getenv("SECTION_CACHE_DIR", "")
+Config.SECTION_CACHE_MB  = int(os.getenv("SECTION_CACHE_MB", "512"))
+
+# Runtime flags – EMBED_CACHE_DIR=<dir> enables the persistent embedding cache,
+# bounded to EMBED_CACHE_MB of float16 vectors (LRU eviction).
+Config.EMBED_CACHE_DIR = os.getenv("EMBED_CACHE_DIR", "")
+Config.EMBED_CACHE_MB  = int(os.getenv("EMBED_CACHE_MB", "512"))
+
+# Runtime flags – ENCODER_BACKEND=torch|onnx|onnx-int8 selects the MiniLM runtime;
+# ONNX models live in ONNX_DIR (python -m app.encoder export).
+Config.ENCODER_BACKEND    = os.getenv("ENCODER_BACKEND", "torch")
+Config.ONNX_DIR           = os.getenv("ONNX_DIR", "/app/models/minilm-onnx")
+Config.ENCODER_MIN_COSINE = float(os.getenv("ENCODER_MIN_COSINE", "0.99"))
+
+# Runtime flag – PRELOAD_MODEL=0 disables loading MiniLM in a background
+# thread while PDFs are parsed.
+Config.PRELOAD_MODEL = (os.getenv("PRELOAD_MODEL", "1") == "1")
+
+# BM25 tokenisation: "whitespace" (lower().split(), the original behaviour) or
+# "multilingual" (punctuation-aware, CJK character bigrams, Arabic diacritics dropped).
+Config.BM25_TOKENIZER = os.getenv("BM25_TOKENIZER", "whitespace")
+
+# Service mode (server.py): requests processed at once, and how many recent
+# results are kept for identical (persona, job, PDF bytes) requests.
+Config.SERVER_CONCURRENCY  = int(os.getenv("SERVER_CONCURRENCY", "2"))
+Config.SERVER_RESULT_CACHE = int(os.getenv("SERVER_RESULT_CACHE", "64"))
+
+# Batch mode (BATCH_PERSONAS=1): every persona JSON in the input dir is answered
+# from one extraction + embedding pass, one result_<name>.json per persona.
+Config.BATCH_PERSONAS = (os.getenv("BATCH_PERSONAS") == "1")
+
+# Result format: "json" (result.json, default) or "ndjson" (result.ndjson,
+# orjson records streamed per document / ranked section as they are ready).
+Config.OUTPUT_FORMAT = os.getenv("OUTPUT_FORMAT", "json")
+
+# Tracing (app/trace.py): TRACE=1 records stage spans and writes a Chrome trace
+# plus a per-stage summary; TRACE_MALLOC=1 adds tracemalloc peaks per span;
+# TRACE_METADATA=1 embeds per-document stage timings in the result metadata.
+Config.TRACE          = (os.getenv("TRACE") == "1")
+Config.TRACE_MALLOC   = (os.getenv("TRACE_MALLOC") == "1")
+Config.TRACE_METADATA = (os.getenv("TRACE_METADATA") == "1")
+Config.TRACE_FILE     = os.getenv("TRACE_FILE", "")
+
+# TextRank graph: TEXTRANK_TOPK=k keeps only each sentence's k nearest
+# neighbours in paragraphs longer than TEXTRANK_SPARSE_MIN sentences
+# (0 = full similarity graph, the networkx-equivalent default).
+Config.TEXTRANK_TOPK       = int(os.getenv("TEXTRANK_TOPK", "0"))
+Config.TEXTRANK_SPARSE_MIN = int(os.getenv("TEXTRANK_SPARSE_MIN", "50"))
+
+# Watch mode (WATCH=1): poll the input dir every WATCH_INTERVAL seconds and
+# re-process only added / changed / removed PDFs (app/watch.py).
+Config.WATCH          = (os.getenv("WATCH") == "1")
+Config.WATCH_INTERVAL = float(os.getenv("WATCH_INTERVAL", "2"))
+
+# Retrieval cascade: CASCADE_POOL=k scores every section with BM25 first and
+# MiniLM-encodes / fuses only the top k (0 = encode every section).
+Config.CASCADE_POOL = int(os.getenv("CASCADE_POOL", "0"))
+
+# Deadline (app/deadline.py): DEADLINE_SEC=s makes a single-persona run degrade
+# (leading sentences instead of TextRank, 1 paragraph per section, shorter
+# section payloads, fewer top sections) to finish within s seconds of start-up,
+# keeping DEADLINE_MARGIN_SEC free for writing the result. 0 = no deadline.
+Config.DEADLINE_SEC        = float(os.getenv("DEADLINE_SEC", "0"))
+Config.DEADLINE_MARGIN_SEC = float(os.getenv("DEADLINE_MARGIN_SEC", "1"))
+
+# ANN retrieval (ANN_INDEX=1, needs EMBED_CACHE_DIR): section payloads are kept in
+# a standing IVF index next to the embedding cache and the dense side of the
+# ranking is read from it (restricted to the current corpus) instead of
+# encoding the section payloads again.
+Config.ANN_INDEX = (os.getenv("ANN_INDEX") == "1")
+
+# Saved BM25 indexes (BM25_INDEX_DIR=<dir>): the index over a corpus' section texts
+# is written as <corpus hash>.bm25.npz and loaded when the same sections are ranked again.
+Config.BM25_INDEX_DIR = os.getenv("BM25_INDEX_DIR", "")
@@ -0,0 +1,129 @@
+# app/deadline.py
+"""
+Wall-clock budget for one collection (DEADLINE_SEC): per-stage elapsed time,
+and a degradation plan that is tightened whenever the projected cost of the
+remaining work no longer fits. Steps, mildest first:
+
+    textrank       refined_text = leading sentences instead of TextRank
+    paragraphs     1 paragraph per section, picked from its first 3 candidates
+                   (instead of 3 picked from all: fewer paragraphs encoded)
+    payload        section payloads truncated to 100 characters (instead of 400)
+    keep_top       fewer top sections
+
+Costs are counted in encoded texts × seconds per text, a prior that is
+replaced by the measured rate once sections have been encoded. The applied
+steps end up in metadata.deadline of the result.
+"""
+from __future__ import annotations
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional
+
+_SEC_PER_TEXT    = 0.004        # MiniLM on CPU, batch 64, before anything was measured
+_SENTS_PER_PARA  = 4            # sentence-encode estimate per refined paragraph
+_PAYLOAD_CHARS   = 100          # truncated section payload
+_PARA_CANDIDATES = 3            # candidate paragraphs encoded per section after "paragraphs"
+
+class Budget:
+    def __init__(self, seconds: float, start: Optional[float] = None, margin: float = 0.0):
+        self.seconds       = seconds
+        self.start         = time.perf_counter() if start is None else start
+        self.margin        = margin           # kept free for writing the result
+        self.sec_per_text  = _SEC_PER_TEXT
+        self.stages: Dict[str, float]      = {}
+        self.degradations: List[Dict[str, Any]] = []
+        # current plan
+        self.textrank      = True
+        self.k_paragraphs  = 3
+        self.max_candidates: Optional[int] = None    # candidate paragraphs per section (None = all)
+        self.payload_chars = 400
+        self.keep_top      = 15
+
+    # ── time ─────────────────────────────────────────────────
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.start
+
+    def remaining(self) -> float:
+        return self.seconds - self.margin - self.elapsed()
+
+    @contextmanager
+    def stage(self, name: str):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[name] = self.stages.get(name, 0.0) + time.perf_counter() - t0
+
+    def observe_encode(self, texts: int, seconds: float) -> None:
+        """Measured encode rate (only batches large enough to be representative)."""
+        if texts >= 32:
+            self.sec_per_text = seconds / texts
+
+    # ── planning ─────────────────────────────────────────────
+    def _degrade(self, step: str, at: str, **detail) -> None:
+        self.degradations.append({"step": step, "at": at, "remaining_sec": round(self.remaining(), 3), **detail})
+
+    def _refine_cost(self, sections: int, paras_per_section: float) -> float:
+        if self.max_candidates is not None:
+            paras_per_section = min(paras_per_section, self.max_candidates)
+        texts = sections * paras_per_section
+        if self.textrank:
+            texts += sections * self.k_paragraphs * _SENTS_PER_PARA
+        return texts * self.sec_per_text
+
+    def plan_rank(self, n_sections: int, paras_per_section: float) -> None:
+        """Before ranking: fit section encoding + an estimated refinement."""
+        def cost() -> float:
+            payload = (self.payload_chars + 50) / 450                 # ~ tokens of heading + payload
+            return n_sections * payload * self.sec_per_text + self._refine_cost(self.keep_top, paras_per_section)
+        self._tighten("rank", cost, paras_per_section, payload=True)
+
+    def plan_refine(self, n_sections: int, candidate_paras: int) -> int:
+        """Before refinement (exact paragraph counts): how many top sections to refine."""
+        per = candidate_paras / max(n_sections, 1)
+        self.keep_top = min(self.keep_top, n_sections)
+        self._tighten("refine", lambda: self._refine_cost(self.keep_top, per), per, payload=False)
+        return self.keep_top
+
+    def allow_textrank(self, sentences: int) -> bool:
+        """Inside refinement, before the sentence encode: still time for TextRank?"""
+        if self.textrank and sentences * self.sec_per_text > self.remaining():
+            self.textrank = False
+            self._degrade("textrank", "textrank", sentences=sentences)
+        return self.textrank
+
+    def _tighten(self, at: str, cost, paras_per_section: float, payload: bool) -> None:
+        steps = [("textrank", {"textrank": False}, {}),
+                 ("paragraphs", {"k_paragraphs": 1, "max_candidates": _PARA_CANDIDATES},
+                  {"k_paragraphs": 1, "candidates": _PARA_CANDIDATES})]
+        if payload:
+            steps.append(("payload", {"payload_chars": _PAYLOAD_CHARS}, {"chars": _PAYLOAD_CHARS}))
+        for step, plan, detail in steps:
+            if cost() <= self.remaining():
+                return
+            if all(getattr(self, k) == v for k, v in plan.items()):
+                continue                                  # already applied
+            old, before = {k: getattr(self, k) for k in plan}, cost()
+            for k, v in plan.items():
+                setattr(self, k, v)
+            if cost() < before:
+                self._degrade(step, at, **detail)
+            else:                                         # saves nothing here: keep the output
+                for k, v in old.items():
+                    setattr(self, k, v)
+        if cost() <= self.remaining():
+            return
+        before = self.keep_top
+        while self.keep_top > 1 and cost() > self.remaining():
+            self.keep_top -= 1
+        if self.keep_top < before:
+            self._degrade("keep_top", at, keep_top=self.keep_top)
+
+    # ── report ───────────────────────────────────────────────
+    def metadata(self) -> Dict[str, Any]:
+        return {
+            "budget_sec"  : self.seconds,
+            "elapsed_sec" : round(self.elapsed(), 3),
+            "stages_sec"  : {k: round(v, 3) for k, v in self.stages.items()},
+            "degradations": self.degradations,
+        }
@@ -0,0 +1,191 @@
+# app/embed_store.py
+"""
+Persistent embedding cache keyed by (model name, normalised-text hash).
+
+<root>/<model>.f16       float16 matrix, memory-mapped, grows by doubling
+<root>/<model>.idx.json  {"dim", "rows", "tick", "keys": {hash: [row, last_used]}}
+<root>/<model>.lock      flock()ed around every read / append / index rewrite
+
+Vectors are always served from the float16 matrix (also on a miss), so a
+text gets the same vector whether or not it was cached before. When the
+matrix exceeds its row budget, the least-recently-used rows are compacted away
+and the file is truncated to the budget (+25 %).
+
+Pool workers, server threads and watch mode share one store: under the lock
+an index written by another process is reloaded (and the matrix re-mapped)
+before rows are read or assigned. The model runs outside the lock.
+"""
+from __future__ import annotations
+import contextlib, fcntl, hashlib, os, pathlib, re, threading
+from typing import Callable, Dict, List, Sequence
+
+import numpy as np
+import orjson
+
+from .config import Config
+
+_WS_RE = re.compile(r'\s+')
+
+def text_key(text: str) -> str:
+    return hashlib.sha1(_WS_RE.sub(" ", text).strip().encode("utf-8")).hexdigest()
+
+def _slug(model_name: str) -> str:
+    return re.sub(r'[^A-Za-z0-9._-]+', "_", model_name)
+
+# ──────────────────────────────────────────────────────────────
+class EmbeddingStore:
+    def __init__(self, root: str | pathlib.Path, model_name: str, dim: int, max_rows: int):
+        root = pathlib.Path(root)
+        root.mkdir(parents=True, exist_ok=True)
+        self.mat_path  = root / f"{_slug(model_name)}.f16"
+        self.idx_path  = root / f"{_slug(model_name)}.idx.json"
+        self.lock_path = root / f"{_slug(model_name)}.lock"
+        self.dim       = dim
+        self.max_rows  = max(1, max_rows)
+        self.max_cap   = max(1024, self.max_rows + self.max_rows // 4)   # file bound after eviction
+        self.hits = self.misses = 0
+
+        self.keys: Dict[str, List[int]] = {}       # hash → [row, last_used tick]
+        self.rows = 0
+        self.tick = 0
+        self._seen    = None                       # (inode, mtime, size) of the index last read / written
+        self._touched: set = set()                 # hits not yet written to the index
+        self._mat     = None
+        self._pid     = None
+        with self._locked():
+            self._sync()
+
+    # ── locking ──────────────────────────────────────────────
+    @contextlib.contextmanager
+    def _locked(self):
+        # one lock fd per process: an fd inherited over fork() shares the child's flock with the parent
+        if self._pid != os.getpid():
+            self._thread_lock = threading.Lock()
+            self._lock_fh     = open(self.lock_path, "a")
+            self._pid         = os.getpid()
+        with self._thread_lock:
+            fcntl.flock(self._lock_fh, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(self._lock_fh, fcntl.LOCK_UN)
+
+    def _sync(self) -> None:
+        """Under the lock: reload an index another writer replaced, map the whole matrix."""
+        try:
+            st  = self.idx_path.stat()
+            sig = (st.st_ino, st.st_mtime_ns, st.st_size)
+        except FileNotFoundError:
+            sig = None
+        if sig is not None and sig != self._seen and self.mat_path.exists():
+            idx = orjson.loads(self.idx_path.read_bytes())
+            if idx.get("dim") == self.dim:
+                self.keys, self.rows, self.tick = idx["keys"], idx["rows"], idx["tick"]
+                for k in self._touched:
+                    if k in self.keys:
+                        self.keys[k][1] = self.tick
+            self._seen = sig
+        size = self.mat_path.stat().st_size if self.mat_path.exists() else 0
+        if self._mat is None or size != self._mat.size * 2 or self.rows > self._mat.shape[0]:
+            self._open(max(self.rows, 1024))
+
+    # ── storage ──────────────────────────────────────────────
+    def _open(self, capacity: int) -> None:
+        if self._mat is not None:
+            self._mat.flush()
+            self._mat = None
+        need = capacity * self.dim * 2
+        if not self.mat_path.exists() or self.mat_path.stat().st_size < need:
+            with open(self.mat_path, "ab") as fh:
+                fh.truncate(need)
+        cap = self.mat_path.stat().st_size // (self.dim * 2)
+        self._mat = np.memmap(self.mat_path, dtype=np.float16, mode="r+", shape=(cap, self.dim))
+
+    def _append(self, vecs: np.ndarray) -> int:
+        start = self.rows
+        if start + len(vecs) > self._mat.shape[0]:
+            self._open(max(min(2 * self._mat.shape[0], self.max_cap), start + len(vecs)))
+        self._mat[start:start + len(vecs)] = vecs.astype(np.float16)
+        self.rows += len(vecs)
+        return start
+
+    def flush(self) -> None:
+        self._mat.flush()
+        tmp = self.idx_path.with_suffix(f".tmp{os.getpid()}")
+        tmp.write_bytes(orjson.dumps({"dim": self.dim, "rows": self.rows,
+                                      "tick": self.tick, "keys": self.keys}))
+        os.replace(tmp, self.idx_path)      # atomic index swap
+        st = self.idx_path.stat()
+        self._seen, self._touched = (st.st_ino, st.st_mtime_ns, st.st_size), set()
+
+    # ── public API ───────────────────────────────────────────
+    def encode(self, texts: Sequence[str], encode_fn: Callable[[List[str]], np.ndarray]) -> np.ndarray:
+        """Return float32 vectors for `texts`, calling encode_fn only for unseen texts."""
+        keys = [text_key(t) for t in texts]
+        encoded: Dict[str, np.ndarray] = {}
+        while True:
+            with self._locked():
+                self._sync()                     # another writer may have appended / evicted
+                self.tick += 1
+                missing: Dict[str, str] = {}
+                for k, t in zip(keys, texts):
+                    if k in self.keys:
+                        self.keys[k][1] = self.tick
+                        self._touched.add(k)
+                    elif k not in missing:
+                        missing[k] = t
+                ready = [k for k in missing if k in encoded]
+                if ready:
+                    start = self._append(np.stack([encoded[k] for k in ready]))
+                    for off, k in enumerate(ready):
+                        self.keys[k] = [start + off, self.tick]
+                todo = {k: t for k, t in missing.items() if k not in encoded}
+                if not todo:
+                    if ready:
+                        if self.rows > self.max_rows:
+                            self._evict()
+                        self.flush()
+                    self.hits += len(texts) - len(encoded)
+                    return self._read(keys)
+            # the model runs without the lock; rows evicted meanwhile are encoded again
+            self.misses += len(todo)
+            encoded.update(zip(todo, np.asarray(encode_fn(list(todo.values())))))
+
+    def _read(self, keys: Sequence[str]) -> np.ndarray:
+        rows = np.fromiter((self.keys[k][0] for k in keys), dtype=np.int64, count=len(keys))
+        return np.asarray(self._mat[rows], dtype=np.float32)
+
+    def _evict(self) -> None:
+        """Keep the max_rows most recently used vectors, compacted to the front; shrink the file."""
+        in_use = sum(1 for entry in self.keys.values() if entry[1] == self.tick)
+        keep = sorted(self.keys.items(), key=lambda kv: kv[1][1], reverse=True)
+        keep = keep[: max(self.max_rows, in_use)]              # never drop rows of this call
+        keep.sort(key=lambda kv: kv[1][0])                     # copy forward in row order
+        for new_row, (k, entry) in enumerate(keep):
+            if entry[0] != new_row:
+                self._mat[new_row] = self._mat[entry[0]]
+            entry[0] = new_row
+        self.keys = dict(keep)
+        self.rows = len(keep)
+        cap = max(self.rows, self.max_cap)
+        if self._mat.shape[0] > cap:                           # others re-map in _sync() before reading
+            self._mat.flush()
+            self._mat = None
+            with open(self.mat_path, "r+b") as fh:
+                fh.truncate(cap * self.dim * 2)
+            self._open(cap)
+
+    def stats(self) -> Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses, "rows": self.rows}
+
+# ──────────────────────────────────────────────────────────────
+_stores: Dict[str, EmbeddingStore] = {}
+
+def get_store(model_name: str, dim: int) -> EmbeddingStore | None:
+    """Process-wide store per model, or None when EMBED_CACHE_DIR is unset."""
+    if not Config.EMBED_CACHE_DIR:
+        return None
+    if model_name not in _stores:
+        max_rows = (Config.EMBED_CACHE_MB << 20) // (dim * 2)
+        _stores[model_name] = EmbeddingStore(Config.EMBED_CACHE_DIR, model_name, dim, max_rows)
+    return _stores[model_name]
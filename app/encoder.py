@@ -0,0 +1,212 @@
+# app/encoder.py
+"""
+One sentence-encoder interface for the whole pipeline.
+
+Backends (ENCODER_BACKEND):
+    torch      SentenceTransformer on CPU (reference)
+    onnx       MiniLM exported to ONNX, run with onnxruntime
+    onnx-int8  same graph with dynamically int8-quantised weights
+
+    python -m app.encoder export [out_dir]   # offline, from the cached weights
+    python -m app.encoder bench  [pdf_dir]   # throughput + cosine vs torch
+"""
+from __future__ import annotations
+import abc, json, pathlib, sys, threading, time
+from typing import Dict, List, Sequence
+
+import numpy as np
+
+from .config import Config
+from .trace  import span
+
+MODEL_NAME = "sentence-transformers/all-MiniLM-L6-v2"
+BACKENDS   = ("torch", "onnx", "onnx-int8")
+_ONNX_FILES = {"onnx": "model.onnx", "onnx-int8": "model.int8.onnx"}
+
+# ──────────────────────────────────────────────────────────────
+class Encoder(abc.ABC):
+    """encode() returns L2-normalised float32 rows, one per input text."""
+    backend: str = ""
+    dim:     int = 0
+
+    @property
+    def name(self) -> str:
+        # distinct per backend so caches never mix torch and quantised vectors
+        return MODEL_NAME if self.backend == "torch" else f"{MODEL_NAME}@{self.backend}"
+
+    @abc.abstractmethod
+    def encode(self, texts: Sequence[str], batch_size: int = 64) -> np.ndarray:
+        ...
+
+class TorchEncoder(Encoder):
+    backend = "torch"
+
+    def __init__(self):
+        from sentence_transformers import SentenceTransformer
+        self.model = SentenceTransformer(MODEL_NAME, device="cpu")
+        self.dim   = self.model.get_sentence_embedding_dimension()
+
+    def encode(self, texts: Sequence[str], batch_size: int = 64) -> np.ndarray:
+        return self.model.encode(list(texts), convert_to_numpy=True,
+                                 normalize_embeddings=True, batch_size=batch_size)
+
+class OnnxEncoder(Encoder):
+    """Tokenise → onnxruntime → attention-masked mean pooling → L2 norm (MiniLM's ST head)."""
+
+    def __init__(self, backend: str = "onnx", model_dir: str | None = None):
+        import onnxruntime as ort
+        from transformers import AutoTokenizer
+
+        model_dir = pathlib.Path(model_dir or Config.ONNX_DIR)
+        path = model_dir / _ONNX_FILES[backend]
+        if not path.exists():
+            raise FileNotFoundError(f"{path} missing – run `python -m app.encoder export {model_dir}`")
+
+        meta = json.loads((model_dir / "encoder.json").read_text())
+        self.backend   = backend
+        self.dim       = meta["dim"]
+        self.max_len   = meta["max_seq_length"]
+        self.tokenizer = AutoTokenizer.from_pretrained(str(model_dir))
+        opts = ort.SessionOptions()
+        opts.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = ort.InferenceSession(str(path), opts, providers=["CPUExecutionProvider"])
+        self.inputs  = [i.name for i in self.session.get_inputs()]
+
+    def encode(self, texts: Sequence[str], batch_size: int = 64) -> np.ndarray:
+        out = np.zeros((len(texts), self.dim), dtype=np.float32)
+        # length-sorted batches keep padding small (as SentenceTransformer does)
+        order = sorted(range(len(texts)), key=lambda i: -len(texts[i]))
+        for b in range(0, len(order), batch_size):
+            idx = order[b:b + batch_size]
+            enc = self.tokenizer([texts[i] for i in idx], padding=True, truncation=True,
+                                 max_length=self.max_len, return_tensors="np")
+            hidden = self.session.run(None, {n: enc[n].astype(np.int64) for n in self.inputs})[0]
+            mask   = enc["attention_mask"][..., None].astype(np.float32)
+            pooled = (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+            out[idx] = pooled / np.clip(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12, None)
+        return out
+
+def make_encoder(backend: str) -> Encoder:
+    if backend == "torch":
+        return TorchEncoder()
+    if backend in _ONNX_FILES:
+        return OnnxEncoder(backend)
+    raise ValueError(f"unknown ENCODER_BACKEND {backend!r} (expected one of {BACKENDS})")
+
+# ──────────────────────────────────────────────────────────────
+_encoder: Encoder | None = None
+_encoder_lock = threading.Lock()
+
+def get_encoder() -> Encoder:
+    """Process-wide encoder singleton; blocks while a preload() is still loading it."""
+    global _encoder
+    with _encoder_lock:
+        if _encoder is None:
+            t0 = time.time()
+            with span("model_load", backend=Config.ENCODER_BACKEND):
+                _encoder = make_encoder(Config.ENCODER_BACKEND)
+            print(f"[encoder] MiniLM ({_encoder.backend}) loaded in {time.time()-t0:.1f}s")
+    return _encoder
+
+def preload() -> threading.Thread:
+    """Import torch / onnxruntime and load the model in the background (errors resurface in get_encoder)."""
+    def _load():
+        try:
+            get_encoder()
+        except Exception:
+            pass
+    t = threading.Thread(target=_load, name="encoder-preload", daemon=True)
+    t.start()
+    return t
+
+# ──────────────────────────────────────────────────────────────
+def export_onnx(out_dir: str | pathlib.Path) -> pathlib.Path:
+    """Export the cached SentenceTransformer weights to ONNX (+ int8) – no network needed."""
+    import torch
+    from onnxruntime.quantization import quantize_dynamic, QuantType
+
+    out_dir = pathlib.Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    st        = TorchEncoder().model
+    module    = st[0]                               # sentence_transformers.models.Transformer
+    tokenizer = module.tokenizer
+    hf_model  = module.auto_model.eval()
+
+    sample = tokenizer(["export sample text"], return_tensors="pt")
+    names  = [n for n in ("input_ids", "attention_mask", "token_type_ids") if n in sample]
+
+    class _Hidden(torch.nn.Module):
+        def __init__(self, model):
+            super().__init__()
+            self.model = model
+
+        def forward(self, *args):
+            return self.model(**dict(zip(names, args)))[0]      # last_hidden_state
+
+    dyn = {n: {0: "batch", 1: "seq"} for n in names + ["last_hidden_state"]}
+    with torch.no_grad():
+        torch.onnx.export(_Hidden(hf_model), tuple(sample[n] for n in names),
+                          str(out_dir / _ONNX_FILES["onnx"]), input_names=names,
+                          output_names=["last_hidden_state"], dynamic_axes=dyn,
+                          opset_version=14, do_constant_folding=True)
+    quantize_dynamic(str(out_dir / _ONNX_FILES["onnx"]), str(out_dir / _ONNX_FILES["onnx-int8"]),
+                     weight_type=QuantType.QInt8)
+
+    tokenizer.save_pretrained(str(out_dir))
+    (out_dir / "encoder.json").write_text(json.dumps({
+        "model_name"    : MODEL_NAME,
+        "dim"           : st.get_sentence_embedding_dimension(),
+        "max_seq_length": module.max_seq_length,
+    }, indent=2))
+    return out_dir
+
+def benchmark(texts: List[str], backends: Sequence[str] = BACKENDS, repeats: int = 2) -> Dict:
+    """Throughput of each backend and its cosine agreement with the torch reference."""
+    report: Dict = {"texts": len(texts), "min_cosine": Config.ENCODER_MIN_COSINE, "backends": {}}
+    ref = None
+    for backend in ("torch",) + tuple(b for b in backends if b != "torch"):
+        try:
+            enc = make_encoder(backend)
+        except (ImportError, FileNotFoundError) as exc:
+            report["backends"][backend] = {"error": str(exc)}
+            continue
+        enc.encode(texts[:8])                       # warm-up
+        t0 = time.perf_counter()
+        for _ in range(repeats):
+            vecs = enc.encode(texts)
+        dt = (time.perf_counter() - t0) / repeats
+        if ref is None:
+            ref = vecs
+        cos = (vecs * ref).sum(axis=1)
+        report["backends"][backend] = {
+            "texts_per_sec": round(len(texts) / dt, 1),
+            "mean_cosine"  : round(float(cos.mean()), 5),
+            "min_cosine"   : round(float(cos.min()), 5),
+        }
+    ok = {b: r for b, r in report["backends"].items()
+          if "error" not in r and r["min_cosine"] >= Config.ENCODER_MIN_COSINE}
+    report["recommended"] = max(ok, key=lambda b: ok[b]["texts_per_sec"]) if ok else "torch"
+    return report
+
+def _bench_texts(pdf_dir: str | None) -> List[str]:
+    if pdf_dir:
+        from .extract_outline_and_sections import extract
+        texts = [p["text"] for i, pdf in enumerate(sorted(pathlib.Path(pdf_dir).glob("*.pdf")), 1)
+                 for s in extract(pdf, f"doc{i}") for p in s["paragraphs"]]
+        if texts:
+            return texts[:2000]
+    words = "revenue market growth strategy investment analysis policy research product risk".split()
+    return [" ".join(words[(i * 7 + j) % len(words)] for j in range(8 + i % 40)) for i in range(512)]
+
+def main():
+    if len(sys.argv) < 2 or sys.argv[1] not in ("export", "bench"):
+        print("Usage: python -m app.encoder export [out_dir] | bench [pdf_dir]")
+        sys.exit(2)
+    arg = sys.argv[2] if len(sys.argv) > 2 else None
+    if sys.argv[1] == "export":
+        print(f"✓ Exported ONNX encoders to {export_onnx(arg or Config.ONNX_DIR)}")
+    else:
+        print(json.dumps(benchmark(_bench_texts(arg)), indent=2))
+
+if __name__ == "__main__":
+    main()
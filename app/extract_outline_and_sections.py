@@ -1,9 +1,10 @@
 import pathlib, re
+from bisect import bisect_left
 from typing import List, Dict, Any
-from .pdf_loader   import load_document
-from .layout       import build_lines
-from .features     import compute_features
+from .sharding     import lines_and_candidates
 from .level_assign import assign_levels
+from .section_cache import get_cache
+from .trace        import span, traced
 
 Section      = Dict[str, Any]
 APPENDIX_RE  = re.compile(r'^(Appendix [A-Z]):\s*(.+)$')
@@ -59,14 +60,29 @@ def _paragraphs_with_page(lines_block) -> List[Dict[str, Any]]:
 def extract(pdf_path: pathlib.Path, doc_id: str) -> List[Section]:
     """
     Return list of section dicts for one PDF (with accurate paragraph-level page tracking).
+    Served from the section cache when SECTION_CACHE_DIR is set and the PDF is unchanged.
     """
-    doc_ctx = load_document(str(pdf_path))
-    lines   = build_lines(doc_ctx)
-    feats   = compute_features(lines, doc_ctx.page_count)
+    pdf_path = pathlib.Path(pdf_path)
+    with span("extract", doc=pdf_path.name):
+        cache = get_cache()
+        if cache is None:
+            return _extract_sections(pdf_path, doc_id)
+
+        key    = cache.key_for(pdf_path)
+        cached = cache.get(key)
+        if cached is not None:
+            return [{"doc_id": doc_id, "doc_name": pdf_path.name, **s} for s in cached]
+
+        sections = _extract_sections(pdf_path, doc_id)
+        cache.put(key, sections)
+        return sections
+
+def _extract_sections(pdf_path: pathlib.Path, doc_id: str) -> List[Section]:
+    lines, cand_feats, page_count = lines_and_candidates(str(pdf_path))
 
     # 1 · candidate headings
-    cands = [f | {"y0": f.get("y0", 0.0)} for f in feats if f["candidate_heading"]]
-    assigned, _ = assign_levels(cands, doc_ctx.page_count)
+    cands = [f | {"y0": f.get("y0", 0.0)} for f in cand_feats]
+    assigned, _ = assign_levels(cands, page_count)
 
     # 2 · merge fragments / subtitles
     merged = _merge_headings(assigned)
@@ -89,47 +105,60 @@ def extract(pdf_path: pathlib.Path, doc_id: str) -> List[Section]:
         headings.append(h)
 
     # 4 · build sections
-    sections: List[Section] = []
+    return _build_sections(lines, headings, doc_id, pdf_path.name)
+
+# ──────────────────────────────────────────────────────────────
+def _next_closing(headings: List[Dict[str, Any]]) -> List[int | None]:
+    """Index of the next heading at the same or a higher level (monotonic stack of open headings)."""
+    closing: List[int | None] = [None] * len(headings)
+    open_stack: List[int] = []
     for idx, h in enumerate(headings):
+        while open_stack and headings[open_stack[-1]]["proposed_level"] >= h["proposed_level"]:
+            closing[open_stack.pop()] = idx
+        open_stack.append(idx)
+    return closing
 
-        # find first content line after heading
-        start_idx = None
-        for i, ln in enumerate(lines):
-            if ln.page == h["page"] and ln.y0 >= h["y0"] - 1e-3:
-                start_idx = i + 1
-                break
-        if start_idx is None or start_idx >= len(lines):
+@traced("segmentation")
+def _build_sections(lines, headings: List[Dict[str, Any]], doc_id: str, doc_name: str) -> List[Section]:
+    """
+    Slice `lines` (sorted by page, y0) into one block per heading, ending at the
+    next same-or-higher heading. Linear in len(lines): every boundary is a
+    bisect into a precomputed (page, y0) index instead of a scan.
+    """
+    keys    = [(ln.page, ln.y0) for ln in lines]
+    n_lines = len(lines)
+
+    # first line at / below each heading position
+    pos = [bisect_left(keys, (h["page"], h["y0"] - 1e-3)) for h in headings]
+    closing = _next_closing(headings)
+
+    sections: List[Section] = []
+    for idx, h in enumerate(headings):
+        # first content line after heading (must sit on the heading's page)
+        first = pos[idx]
+        if first >= n_lines or lines[first].page != h["page"]:
             continue                              # orphan heading
+        start_idx = first + 1
+        if start_idx >= n_lines:
+            continue
 
-        # locate next heading (same / higher level)
-        next_y0 = next_page = None
-        for nxt in headings[idx + 1:]:
-            if nxt["proposed_level"] <= h["proposed_level"]:
-                next_y0, next_page = nxt["y0"], nxt["page"]
-                break
-
-        block = []
-        for ln in lines[start_idx:]:
-            if next_page is not None and (
-                ln.page > next_page or (ln.page == next_page and ln.y0 >= next_y0 - 1e-3)
-            ):
-                break
-            block.append(ln)
+        # block ends where the next same / higher-level heading starts
+        nxt = closing[idx]
+        end_idx = n_lines if nxt is None else max(start_idx, pos[nxt])
+        block = lines[start_idx:end_idx]
         if not block:
             continue
 
         para_objs = _paragraphs_with_page(block)
-        full_txt  = "\n\n".join(p["text"] for p in para_objs)
 
         sections.append({
             "doc_id"     : doc_id,
-            "doc_name"   : pdf_path.name,
+            "doc_name"   : doc_name,
             "heading"    : h["text"].strip(),
             "level"      : h["proposed_level"],       # numeric level from assign_levels
             "page_start" : block[0].page,
             "page_end"   : block[-1].page,
-            "full_text"  : full_txt,
-            "paragraphs" : para_objs
+            "paragraphs" : para_objs              # full_text: SectionStore / section_store.full_text()
         })
 
     return sections
\ No newline at end of file
@@ -1,10 +1,16 @@
 # app/features.py
-import re, statistics
-from typing import List, Dict, Any
+import re, statistics, heapq
+from dataclasses import dataclass, field
+from typing import List, Dict, Any, Iterable, Optional
+
+import numpy as np
 
 from .layout import Line
 from .config import Config
+from .trace  import traced
 from .text_utils import (
+    SCRIPTS,
+    doc_scripts,
     normalize_all_digits,
     normalize_rtl,
     script_ratios,
@@ -40,12 +46,37 @@ _PAGE_NUM_TOKEN_RE  = re.compile(r'^\d+\.?$')
 
 _INST_RE            = re.compile(r'\b(university|department|laboratory|college|school|institute)\b', re.IGNORECASE)
 
+_latin_numbering_re = re.compile(r'^\d+(?:\.\d+)*\s+[A-Za-z]')
+_any_digit_re       = re.compile(r'[0-9٠-٩]')
+_ar_basic_re        = re.compile(r'^(المقدمة|الخاتمة)$')
+_ONLY_PUNCT_RE      = re.compile(r'^[\d,，.\s％%]+$')
+_YEN_AMOUNT_RE      = re.compile(r'^[\d,，\s]+(?:兆|億|万)?[\d,，\s]*(?:円)?[，,]?$')
+_PERCENT_ONLY_RE    = re.compile(r'^[\d,，]+(?:\.\d+)?[％%]$')
+_FREQ_ONLY_RE       = re.compile(r'^\d+(?:\.\d+)?\s*[mMkKgG]?[hH][zZ]$')
+
+# ---- prefilter: a line matching neither pattern, not bold and below the heading
+# ---- font threshold can never become a candidate (no rule can rescue it)
+# any character of a script that unlocks the non-Latin rules
+_NON_LATIN_RE       = re.compile(
+    r'[\u0600-\u06FF\u0750-\u077F\u08A0-\u08FF\u0900-\u097F'
+    r'\u3040-\u30FF\u3400-\u4DBF\u4E00-\u9FFF\uFB50-\uFEFC\uFF00-\uFFEF]'
+)
+# superset of every Latin-script starts_numbering pattern, on digit-normalised text
+# (the Arabic / Hindi chapter forms are already caught by _NON_LATIN_RE)
+_ANY_NUMBERING_RE   = re.compile(
+    r'^(?:\d+(?:\.\d+)*\s'
+    r'|第[0-9\uFF10-\uFF19]+章'
+    r'|(?i:Dai[0-9]+sho)'
+    r'|(?i:Appendix\s+[A-Z]\b)'
+    r'|[IVXLC]+\.?\s'
+    r'|[0-9\uFF10-\uFF19]+(?:[.\uFF0E][0-9\uFF10-\uFF19]+)+)'
+)
+
 # ────────────────────────────────── helpers ───────────────────────────────────
-def _median_body_font(lines: List[Line]) -> float:
-    sizes = [ln.avg_size for ln in lines if ln.avg_size > 0]
+def _trimmed_median(sizes: List[float]) -> float:
+    """Median of the lower 95 % of an ascending size list."""
     if not sizes:
         return 1.0
-    sizes.sort()
     trimmed = sizes[: int(len(sizes) * 0.95)] or sizes
     try:
         return statistics.median(trimmed) or 1.0
@@ -75,203 +106,319 @@ def _detect_toc_pages(lines: List[Line]) -> set[int]:
             toc_pages.add(p)
     return toc_pages
 
-# ────────────────────────────── main feature fn ───────────────────────────────
-def compute_features(lines: List[Line], page_count: int) -> List[Dict[str, Any]]:
-    body_med   = _median_body_font(lines)
-    left_edge  = _page_left_margins(lines)
-    toc_pages  = _detect_toc_pages(lines)
+def _rtl_normalizer(scripts: frozenset):
+    """normalize_rtl, or a no-op for documents without Arabic (where it would return its input)."""
+    return normalize_rtl if "arabic" in scripts else str
 
-    # repetition map for running headers
+def _text_pages(lines: List[Line], scripts: frozenset) -> Dict[str, set[int]]:
+    """Repetition map for running headers: normalised text → pages it occurs on."""
+    rtl = _rtl_normalizer(scripts)
     text_pages: Dict[str, set[int]] = {}
     for ln in lines:
-        text_pages.setdefault(normalize_rtl(ln.text.strip()), set()).add(ln.page)
-
-    feats: List[Dict[str, Any]] = []
-
-    for idx, ln in enumerate(lines):
-        raw         = normalize_rtl(ln.text.strip())
-        norm_digits = normalize_all_digits(raw)
-
-        words        = [w for w in _word_split_re.split(raw) if w]
-        word_count   = len(words)
-        char_count   = len(raw)
-        rel_font     = (ln.avg_size / body_med) if body_med else 1.0
-        is_bold      = ln.bold_frac >= 0.6
-
-        # script detection
-        ratios     = script_ratios(raw)
-        dom_script = dominant_script(ratios)
-        if dom_script == "unknown" and _AR_RANGE_RE.search(raw):
-            dom_script = "arabic"
-        if dom_script == "unknown" and _CJK_RANGE_RE.search(raw):
-            dom_script = "cjk"
-
-        # numbering / chapter patterns
-        starts_numbering = False
-        # Latin refinement: digits(.digits)* space + *letter* afterwards
-        if dom_script == "latin":
-            if re.match(r'^\d+(?:\.\d+)*\s+[A-Za-z]', norm_digits):
-                starts_numbering = True
-        else:
-            if _numbering_re.match(norm_digits):
-                starts_numbering = True
-        if _jp_chapter_re.match(norm_digits):  starts_numbering = True
-        if _romaji_jp_re.match(norm_digits):   starts_numbering = True
-        if _ar_chapter_re.match(norm_digits):  starts_numbering = True
-        if _hi_chapter_re.match(norm_digits):  starts_numbering = True
-        if _appendix_re.match(raw):            starts_numbering = True
-        if _roman_re.match(raw):               starts_numbering = True
-        if _jp_numdot_re.match(norm_digits):   starts_numbering = True
-        if dom_script == "arabic" and re.search(r'[0-9٠-٩]', norm_digits):
-            starts_numbering = True
-
-        ends_with_period = raw.endswith(('.', '?', '!', '。', '؟'))
-        letters          = [c for c in raw if c.isalpha()]
-        all_caps         = bool(letters) and all(ch.isupper() for ch in letters)
-        title_case       = bool(words) and all((w[0].isupper() or not w[0].isalpha()) for w in words if w)
-
-        # vertical gap above
-        gap_above = None
-        for j in range(idx - 1, -1, -1):
-            if lines[j].page == ln.page:
-                gap_above = ln.y0 - lines[j].y1
-                break
-
-        repeat_count    = len(text_pages.get(raw, set()))
-        is_caption_like = bool(_caption_prefix_re.match(raw.lower()))
-        has_dot_leader  = bool(_dot_leader_re.search(raw))
-
-        feat = {
-            "page"               : ln.page + 1,
-            "text"               : raw,
-            "avg_size"           : ln.avg_size,
-            "rel_font_size"      : round(rel_font, 3),
-            "is_bold"            : is_bold,
-            "word_count"         : word_count,
-            "char_count"         : char_count,
-            "starts_numbering"   : starts_numbering,
-            "all_caps"           : all_caps,
-            "title_case"         : title_case,
-            "ends_with_period"   : ends_with_period,
-            "gap_above"          : gap_above,
-            "repeat_count"       : repeat_count,
-            "is_caption_like"    : is_caption_like,
-            "has_dot_leader"     : has_dot_leader,
-            "lower_text"         : raw.lower(),
-            "script_dom"         : dom_script,
-            "script_ratios"      : ratios,
-            "x0"                 : ln.x0,
-            "y0"                 : ln.y0,
-            "_page_idx"          : ln.page,
-        }
-        feats.append(feat)
-
-    # ───────────────────────── candidate decision ────────────────────────────
-    for f in feats:
-        script_dom  = f["script_dom"]
-        non_latin   = script_dom in ("cjk", "arabic", "devanagari")
-        page_idx    = f["_page_idx"]
-        page_left   = left_edge.get(page_idx, 0.0)
-        in_toc_page = page_idx in toc_pages
-
-        font_ok = (
-            f["rel_font_size"] >= Config.REL_FONT_HEADING_MIN
-            or (f["rel_font_size"] >= Config.REL_FONT_HEADING_LOWERED and f["is_bold"])
-        )
-        if script_dom in ("arabic", "cjk") and f["starts_numbering"]:
-            font_ok = True
-
-        casing_ok = f["is_bold"] or f["title_case"] or f["all_caps"]
-        if non_latin:
-            casing_ok = True
-
-        candidate = (
-            (
-                font_ok
-                or (f["is_bold"] and f["word_count"] <= Config.MAX_SHORT_HEADING_WORDS and not f["ends_with_period"])
-                or f["starts_numbering"]
-            )
-            and 1 <= f["word_count"] <= Config.MAX_HEADING_WORDS
-            and f["char_count"] >= 2
-            and casing_ok
-        )
-
-        # rescues
-        if not candidate and non_latin and f["starts_numbering"]:
-            candidate = True
-        if not candidate and script_dom == "cjk" and _jp_numdot_re.match(normalize_all_digits(f["text"])):
-            candidate = True
-        if not candidate and script_dom == "arabic" and f["rel_font_size"] >= 1.05 and f["word_count"] <= 12:
-            candidate = True
-
-        # numeric-only / axis labels (Latin only)
-        if candidate and script_dom == "latin":
-            txt = f["text"].strip()
-            if (
-                _NUMERIC_SINGLE_RE.fullmatch(txt)
-                or _NUMERIC_LIST_RE.fullmatch(txt)
-                or (f["word_count"] == 1 and txt.endswith(".") and len(txt) <= 4 and _PAGE_NUM_TOKEN_RE.fullmatch(txt))
-            ):
-                candidate = False
-            # page number match (e.g., "2" / "2.")
-            else:
-                stripped = txt.rstrip(".")
-                if stripped.isdigit() and int(stripped) == f["page"]:
-                    candidate = False
-        if candidate and script_dom in ("cjk", "arabic", "devanagari", "unknown"):
-            txt = f["text"].strip()
-            norm = normalize_all_digits(txt)
-            # letters excluding common axis units
-            letters = [c for c in norm if c.isalpha()]
-            letters_join = "".join(letters).lower()
-            has_digit = any(ch.isdigit() for ch in norm)
-            # heuristics: only digits + separators + units/percent, or MHz/KHz/GHz axis ticks
-            units_tokens = any(u in norm for u in ("兆", "億", "万", "円", "%", "％"))
-            mhz_like = letters_join in ("mhz", "khz", "ghz")
-            only_punct = re.fullmatch(r'^[\d,，.\s％%]+$', norm) is not None
-            yen_amount = re.fullmatch(r'^[\d,，\s]+(?:兆|億|万)?[\d,，\s]*(?:円)?[，,]?$', norm)
-            percent_only = re.fullmatch(r'^[\d,，]+(?:\.\d+)?[％%]$', norm)
-            freq_only = re.fullmatch(r'^\d+(?:\.\d+)?\s*[mMkKgG]?[hH][zZ]$', norm)
-            if has_digit and (
-                percent_only or freq_only or yen_amount or
-                (only_punct and not letters) or
-                (units_tokens and (not letters or mhz_like))
-            ):
-                candidate = False
+        text_pages.setdefault(rtl(ln.text.strip()), set()).add(ln.page)
+    return text_pages
+
+# ───────────────────────── document-global statistics ─────────────────────────
+@dataclass
+class DocStats:
+    """Statistics compute_features needs from the whole document, mergeable across page shards."""
+    sizes:      List[float]                      # ascending positive line sizes
+    text_pages: Dict[str, set[int]] = field(default_factory=dict)
+    toc_pages:  set[int]            = field(default_factory=set)
+    scripts:    frozenset           = frozenset(SCRIPTS)      # doc_scripts(); unknown → all
+
+    @property
+    def body_med(self) -> float:
+        return _trimmed_median(self.sizes)
+
+def doc_stats(lines: List[Line]) -> DocStats:
+    scripts = doc_scripts(ln.text for ln in lines)
+    return DocStats(
+        sizes      = sorted(ln.avg_size for ln in lines if ln.avg_size > 0),
+        text_pages = _text_pages(lines, scripts),
+        toc_pages  = _detect_toc_pages(lines),
+        scripts    = scripts,
+    )
+
+def merge_stats(parts: Iterable[DocStats]) -> DocStats:
+    """Combine shard statistics; exact because shards never split a page."""
+    parts = list(parts)
+    text_pages: Dict[str, set[int]] = {}
+    for part in parts:
+        for txt, pages in part.text_pages.items():
+            text_pages.setdefault(txt, set()).update(pages)
+    return DocStats(
+        sizes      = list(heapq.merge(*(part.sizes for part in parts))),
+        text_pages = text_pages,
+        toc_pages  = set().union(*(part.toc_pages for part in parts)),
+        scripts    = frozenset().union(*(part.scripts for part in parts)),
+    )
+
+# ─────────────────────────────── feature table ────────────────────────────────
+@dataclass
+class FeatureTable:
+    """
+    Columnar per-line features. Cheap columns exist for every line; the full
+    feature dict (scripts, casing, numbering, …) only for prefilter survivors.
+    """
+    page:          np.ndarray                 # 1-based, like the "page" feature
+    avg_size:      np.ndarray
+    rel_font_size: np.ndarray
+    is_bold:       np.ndarray
+    gap_above:     np.ndarray                 # NaN → first line on its page
+    x0:            np.ndarray
+    y0:            np.ndarray
+    candidate:     np.ndarray                 # candidate_heading
+    rows:          Dict[int, Dict[str, Any]]  # line index → feature dict (survivors)
+
+    def __len__(self) -> int:
+        return len(self.page)
+
+    def candidates(self) -> List[Dict[str, Any]]:
+        """Feature dicts of candidate headings, in line order."""
+        return [self.rows[i] for i in np.flatnonzero(self.candidate).tolist()]
+
+def _column(lines: List[Line], attr: str, dtype=np.float64) -> np.ndarray:
+    return np.fromiter((getattr(ln, attr) for ln in lines), dtype=dtype, count=len(lines))
 
-        # negative filters / FP killers
-        if candidate:
-            if (
-                f["repeat_count"] >= Config.RUNNING_HEADER_MIN_PAGES
-                and (f["repeat_count"] / page_count) >= Config.RUNNING_HEADER_FRACTION
-            ):
-                candidate = False
-            elif f["is_caption_like"] or f["has_dot_leader"]:
-                candidate = False
-            elif f["rel_font_size"] < 1.02 and not f["is_bold"] and not f["starts_numbering"] and not non_latin:
-                candidate = False
-            elif f["lower_text"].startswith("page "):
-                candidate = False
-            elif (
-                script_dom == "latin"
-                and (f["x0"] >= page_left + _LEFT_SLACK_PT)
-                and not (font_ok or f["is_bold"] or f["starts_numbering"])
-            ):
-                candidate = False
-            elif (
-                script_dom == "latin"
-                and not f["is_bold"]
-                and not f["starts_numbering"]
-                and (f["text"].count(".") >= 1 or f["word_count"] >= 10)
-            ):
-                candidate = False
-            elif in_toc_page and script_dom == "latin" and not (f["rel_font_size"] >= 1.25 or f["starts_numbering"]):
+# ────────────────────────────── main feature fn ───────────────────────────────
+@traced("compute_features")
+def compute_features(
+    lines: List[Line],
+    page_count: int,
+    stats: Optional[DocStats] = None,
+) -> FeatureTable:
+    """
+    Per-line features + candidate_heading decision. `stats` lets a page shard
+    use document-global statistics; by default they are computed from `lines`.
+    """
+    if stats is None:
+        stats = doc_stats(lines)
+    body_med   = stats.body_med
+    left_edge  = _page_left_margins(lines)        # per page → shard-local is exact
+    toc_pages  = stats.toc_pages
+    text_pages = stats.text_pages                 # repetition map for running headers
+    rtl        = _rtl_normalizer(stats.scripts)   # scripts detected once per document
+
+    n        = len(lines)
+    page0    = _column(lines, "page", np.int64)
+    avg_size = _column(lines, "avg_size")
+    y0, y1   = _column(lines, "y0"), _column(lines, "y1")
+    rel_font = avg_size / body_med if body_med else np.ones(n)
+    is_bold  = _column(lines, "bold_frac") >= 0.6
+
+    # vertical gap above: one forward pass (lines are sorted by page, y0)
+    gap_above = np.full(n, np.nan)
+    if n > 1:
+        same_page = page0[1:] == page0[:-1]
+        gap_above[1:][same_page] = (y0[1:] - y1[:-1])[same_page]
+
+    # prefilter (round(rel, 3) below the threshold ⇔ rel < threshold - 0.001, conservatively)
+    keep = is_bold | (rel_font >= Config.REL_FONT_HEADING_MIN - 0.001)
+    for i in np.flatnonzero(~keep).tolist():
+        txt = lines[i].text
+        if _NON_LATIN_RE.search(txt) or _ANY_NUMBERING_RE.match(normalize_all_digits(txt.strip())):
+            keep[i] = True
+
+    rows: Dict[int, Dict[str, Any]] = {}
+    for i in np.flatnonzero(keep).tolist():
+        gap = gap_above[i]
+        f = _line_features(lines[i], body_med, None if gap != gap else float(gap), text_pages, rtl)
+        f["candidate_heading"] = _is_candidate(f, page_count, left_edge, toc_pages)
+        rows[i] = f
+
+    _post_passes(rows, lines)
+
+    candidate = np.zeros(n, dtype=bool)
+    for i, f in rows.items():
+        candidate[i] = f["candidate_heading"]
+
+    return FeatureTable(
+        page          = page0 + 1,
+        avg_size      = avg_size,
+        rel_font_size = np.round(rel_font, 3),
+        is_bold       = is_bold,
+        gap_above     = gap_above,
+        x0            = _column(lines, "x0"),
+        y0            = y0,
+        candidate     = candidate,
+        rows          = rows,
+    )
+
+def _line_features(ln: Line, body_med: float, gap_above, text_pages: Dict[str, set[int]],
+                   rtl=normalize_rtl) -> Dict[str, Any]:
+    raw         = rtl(ln.text.strip())
+    norm_digits = normalize_all_digits(raw)
+
+    words        = [w for w in _word_split_re.split(raw) if w]
+    word_count   = len(words)
+    char_count   = len(raw)
+    rel_font     = (ln.avg_size / body_med) if body_med else 1.0
+    is_bold      = ln.bold_frac >= 0.6
+
+    # script detection
+    ratios     = script_ratios(raw)
+    dom_script = dominant_script(ratios)
+    if dom_script == "unknown" and _AR_RANGE_RE.search(raw):
+        dom_script = "arabic"
+    if dom_script == "unknown" and _CJK_RANGE_RE.search(raw):
+        dom_script = "cjk"
+
+    # numbering / chapter patterns
+    # Latin refinement: digits(.digits)* space + *letter* afterwards
+    if dom_script == "latin":
+        starts_numbering = bool(_latin_numbering_re.match(norm_digits))
+    else:
+        starts_numbering = bool(_numbering_re.match(norm_digits))
+    starts_numbering = starts_numbering or bool(
+        _jp_chapter_re.match(norm_digits)
+        or _romaji_jp_re.match(norm_digits)
+        or _ar_chapter_re.match(norm_digits)
+        or _hi_chapter_re.match(norm_digits)
+        or _appendix_re.match(raw)
+        or _roman_re.match(raw)
+        or _jp_numdot_re.match(norm_digits)
+        or (dom_script == "arabic" and _any_digit_re.search(norm_digits))
+    )
+
+    ends_with_period = raw.endswith(('.', '?', '!', '。', '؟'))
+    letters          = [c for c in raw if c.isalpha()]
+    all_caps         = bool(letters) and all(ch.isupper() for ch in letters)
+    title_case       = bool(words) and all((w[0].isupper() or not w[0].isalpha()) for w in words if w)
+
+    return {
+        "page"               : ln.page + 1,
+        "text"               : raw,
+        "avg_size"           : ln.avg_size,
+        "rel_font_size"      : round(rel_font, 3),
+        "is_bold"            : is_bold,
+        "word_count"         : word_count,
+        "char_count"         : char_count,
+        "starts_numbering"   : starts_numbering,
+        "all_caps"           : all_caps,
+        "title_case"         : title_case,
+        "ends_with_period"   : ends_with_period,
+        "gap_above"          : gap_above,
+        "repeat_count"       : len(text_pages.get(raw, set())),
+        "is_caption_like"    : bool(_caption_prefix_re.match(raw.lower())),
+        "has_dot_leader"     : bool(_dot_leader_re.search(raw)),
+        "lower_text"         : raw.lower(),
+        "script_dom"         : dom_script,
+        "script_ratios"      : ratios,
+        "x0"                 : ln.x0,
+        "y0"                 : ln.y0,
+        "_page_idx"          : ln.page,
+    }
+
+# ───────────────────────── candidate decision ────────────────────────────
+def _is_candidate(f: Dict[str, Any], page_count: int, left_edge: Dict[int, float], toc_pages: set[int]) -> bool:
+    script_dom  = f["script_dom"]
+    non_latin   = script_dom in ("cjk", "arabic", "devanagari")
+    page_idx    = f["_page_idx"]
+    page_left   = left_edge.get(page_idx, 0.0)
+    in_toc_page = page_idx in toc_pages
+
+    font_ok = (
+        f["rel_font_size"] >= Config.REL_FONT_HEADING_MIN
+        or (f["rel_font_size"] >= Config.REL_FONT_HEADING_LOWERED and f["is_bold"])
+    )
+    if script_dom in ("arabic", "cjk") and f["starts_numbering"]:
+        font_ok = True
+
+    casing_ok = f["is_bold"] or f["title_case"] or f["all_caps"]
+    if non_latin:
+        casing_ok = True
+
+    candidate = (
+        (
+            font_ok
+            or (f["is_bold"] and f["word_count"] <= Config.MAX_SHORT_HEADING_WORDS and not f["ends_with_period"])
+            or f["starts_numbering"]
+        )
+        and 1 <= f["word_count"] <= Config.MAX_HEADING_WORDS
+        and f["char_count"] >= 2
+        and casing_ok
+    )
+
+    # rescues
+    if not candidate and non_latin and f["starts_numbering"]:
+        candidate = True
+    if not candidate and script_dom == "cjk" and _jp_numdot_re.match(normalize_all_digits(f["text"])):
+        candidate = True
+    if not candidate and script_dom == "arabic" and f["rel_font_size"] >= 1.05 and f["word_count"] <= 12:
+        candidate = True
+
+    # numeric-only / axis labels (Latin only)
+    if candidate and script_dom == "latin":
+        txt = f["text"].strip()
+        if (
+            _NUMERIC_SINGLE_RE.fullmatch(txt)
+            or _NUMERIC_LIST_RE.fullmatch(txt)
+            or (f["word_count"] == 1 and txt.endswith(".") and len(txt) <= 4 and _PAGE_NUM_TOKEN_RE.fullmatch(txt))
+        ):
+            candidate = False
+        # page number match (e.g., "2" / "2.")
+        else:
+            stripped = txt.rstrip(".")
+            if stripped.isdigit() and int(stripped) == f["page"]:
                 candidate = False
-
-        f["candidate_heading"] = candidate
+    if candidate and script_dom in ("cjk", "arabic", "devanagari", "unknown"):
+        txt = f["text"].strip()
+        norm = normalize_all_digits(txt)
+        # letters excluding common axis units
+        letters = [c for c in norm if c.isalpha()]
+        letters_join = "".join(letters).lower()
+        has_digit = any(ch.isdigit() for ch in norm)
+        # heuristics: only digits + separators + units/percent, or MHz/KHz/GHz axis ticks
+        units_tokens = any(u in norm for u in ("兆", "億", "万", "円", "%", "％"))
+        mhz_like = letters_join in ("mhz", "khz", "ghz")
+        only_punct = _ONLY_PUNCT_RE.fullmatch(norm) is not None
+        yen_amount = _YEN_AMOUNT_RE.fullmatch(norm)
+        percent_only = _PERCENT_ONLY_RE.fullmatch(norm)
+        freq_only = _FREQ_ONLY_RE.fullmatch(norm)
+        if has_digit and (
+            percent_only or freq_only or yen_amount or
+            (only_punct and not letters) or
+            (units_tokens and (not letters or mhz_like))
+        ):
+            candidate = False
+
+    # negative filters / FP killers
+    if candidate:
+        if (
+            f["repeat_count"] >= Config.RUNNING_HEADER_MIN_PAGES
+            and (f["repeat_count"] / page_count) >= Config.RUNNING_HEADER_FRACTION
+        ):
+            candidate = False
+        elif f["is_caption_like"] or f["has_dot_leader"]:
+            candidate = False
+        elif f["rel_font_size"] < 1.02 and not f["is_bold"] and not f["starts_numbering"] and not non_latin:
+            candidate = False
+        elif f["lower_text"].startswith("page "):
+            candidate = False
+        elif (
+            script_dom == "latin"
+            and (f["x0"] >= page_left + _LEFT_SLACK_PT)
+            and not (font_ok or f["is_bold"] or f["starts_numbering"])
+        ):
+            candidate = False
+        elif (
+            script_dom == "latin"
+            and not f["is_bold"]
+            and not f["starts_numbering"]
+            and (f["text"].count(".") >= 1 or f["word_count"] >= 10)
+        ):
+            candidate = False
+        elif in_toc_page and script_dom == "latin" and not (f["rel_font_size"] >= 1.25 or f["starts_numbering"]):
+            candidate = False
+
+    return candidate
+
+def _post_passes(rows: Dict[int, Dict[str, Any]], lines: List[Line]) -> None:
+    """Document-order passes; they only ever touch prefilter survivors."""
+    feats = list(rows.values())                   # ascending line index
 
     # Arabic basic words
-    _ar_basic_re = re.compile(r'^(المقدمة|الخاتمة)$')
     for f in feats:
         if _ar_basic_re.match(f["text"]):
             f["starts_numbering"]  = True
@@ -308,14 +455,16 @@ def compute_features(lines: List[Line], page_count: int) -> List[Dict[str, Any]]
             f["candidate_heading"] = True
 
     # --- Author / affiliation suppression (page 1) ---
-    page1_feats = [f for f in feats if f["page"] == 1]
-    has_email   = any("@" in f["text"] for f in page1_feats)
+    # every page-1 line counts for the e-mail check, survivors or not
+    page1_idx = [i for i, ln in enumerate(lines) if ln.page == 0]
+    has_email = any("@" in (rows[i]["text"] if i in rows else lines[i].text) for i in page1_idx)
+    page1_rows = [(i, rows[i]) for i in page1_idx if i in rows]
     abstract_pos = None
-    for i, f in enumerate(page1_feats):
+    for i, f in page1_rows:
         if f["candidate_heading"] and f["text"].strip().upper() == "ABSTRACT":
             abstract_pos = i
             break
-    for i, f in enumerate(page1_feats):
+    for i, f in page1_rows:
         if not f["candidate_heading"]:
             continue
         if f["text"].strip().upper() == "ABSTRACT":
@@ -326,5 +475,3 @@ def compute_features(lines: List[Line], page_count: int) -> List[Dict[str, Any]]
             f["candidate_heading"] = False
         elif before_abstract and ("," in txt or _INST_RE.search(txt)):
             f["candidate_heading"] = False
-
-    return feats
\ No newline at end of file
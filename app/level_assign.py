@@ -2,6 +2,8 @@
 import re
 from typing import List, Dict, Any, Tuple
 
+from .trace import traced
+
 # latin/fullwidth/arabic digits + dot/fullwidth dot
 _NUMBERING_RE = re.compile(r'^([0-9\uFF10-\uFF19٠-٩]+(?:[.\uFF0E][0-9\uFF10-\uFF19٠-٩]+)*)')
 
@@ -36,14 +38,14 @@ def _cluster_font_sizes(cands: List[Dict[str, Any]], tol: float = 0.75) -> list[
     sizes = sorted({round(c["avg_size"], 2) for c in cands}, reverse=True)
     tiers: list[list[float]] = []
     for s in sizes:
-        for tier in tiers:
-            if abs(tier[0] - s) <= tol:
-                tier.append(s)
-                break
+        # sizes descend, so an older tier's head is > tol above s once a newer tier exists
+        if tiers and abs(tiers[-1][0] - s) <= tol:
+            tiers[-1].append(s)
         else:
             tiers.append([s])
     return tiers
 
+@traced("assign_levels")
 def assign_levels(candidates: List[Dict[str,Any]], page_count: int) -> Tuple[List[Dict[str,Any]], Dict[str,Any]]:
     if not candidates:
         return [], {}
@@ -79,10 +81,9 @@ def assign_levels(candidates: List[Dict[str,Any]], page_count: int) -> Tuple[Lis
     candidates = merged
 
     # 2) backward merge: number-only line prepended to previous heading
-    i = 1
-    while i < len(candidates):
-        cur = candidates[i]
-        prev = candidates[i - 1]
+    kept: list[Dict[str, Any]] = candidates[:1]
+    for cur in candidates[1:]:
+        prev = kept[-1]
         if (
             _PURE_NUMBER_RE.fullmatch(cur["text"].strip())
             and prev["page"] == cur["page"]
@@ -90,9 +91,9 @@ def assign_levels(candidates: List[Dict[str,Any]], page_count: int) -> Tuple[Lis
             and abs(prev["avg_size"] - cur["avg_size"]) <= 0.5
         ):
             prev["text"] = (cur["text"].strip() + " " + prev["text"]).strip()
-            candidates.pop(i)
             continue
-        i += 1
+        kept.append(cur)
+    candidates = kept
 
     # 3) choose title
     pool = [c for c in candidates if c["page"] == 1] or candidates
@@ -102,6 +103,7 @@ def assign_levels(candidates: List[Dict[str,Any]], page_count: int) -> Tuple[Lis
     remaining = [c for c in candidates if c is not title_candidate]
 
     # 4) If title looks like heading, also emit as H1
+    clone = None
     if _looks_like_heading(title_candidate["text"]):
         clone = dict(title_candidate)
         clone["proposed_level"] = "H1"
@@ -138,9 +140,11 @@ def assign_levels(candidates: List[Dict[str,Any]], page_count: int) -> Tuple[Lis
             c["proposed_level"] = "H2"
         last_level = c["proposed_level"]
 
-    # final ordering by reading order
-    ordered = sorted(candidates + [c for c in remaining if c not in candidates],
-                     key=lambda c: (c["page"], c.get("y0", 0.0)))
+    # final ordering by reading order; every other entry of `remaining` is one of
+    # `candidates` (by identity), so only the H1 clone can be new – it is kept
+    # unless an equal dict already exists
+    extra = [clone] if clone is not None and clone not in candidates else []
+    ordered = sorted(candidates + extra, key=lambda c: (c["page"], c.get("y0", 0.0)))
     return ordered, title_candidate
 
 def dedupe_outline(entries: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
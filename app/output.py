@@ -0,0 +1,88 @@
+# app/output.py
+"""
+Result writers.
+
+OUTPUT_FORMAT=json (default)  one pretty-printed result.json, layout unchanged
+OUTPUT_FORMAT=ndjson          result.ndjson, one orjson record per line, each
+                              flushed as soon as it is known:
+
+    {"type": "metadata", ...}               persona, job, input PDFs – at start
+    {"type": "document", ...}               per PDF, as its extraction finishes
+    {"type": "extracted_section", ...}      one per ranked section (result.json entry)
+    {"type": "sub_section_analysis", ...}   refined paragraphs per top section
+    {"type": "summary", ...}                counts (+ "trace" with TRACE_METADATA=1) –
+                                            last line, marks a complete run
+"""
+from __future__ import annotations
+import json, pathlib, time
+from typing import List, Sequence
+
+import orjson
+
+FORMATS = ("json", "ndjson")
+
+def write_json(path: pathlib.Path, out_json: dict) -> None:
+    with open(path, "w", encoding="utf-8") as fh:
+        json.dump(out_json, fh, ensure_ascii=False, indent=2)
+
+# ──────────────────────────────────────────────────────────────
+class NDJSONWriter:
+    def __init__(self, path: pathlib.Path, pdf_paths: Sequence[pathlib.Path]):
+        self.path   = pathlib.Path(path)
+        self._names = [p.name for p in pdf_paths]
+        self._fh    = open(self.path, "wb")
+        self._t0    = time.perf_counter()
+        self.counts = {"documents": 0, "extracted_sections": 0, "sub_section_analysis": 0}
+
+    def _write(self, record: dict) -> None:
+        self._fh.write(orjson.dumps(record) + b"\n")
+        self._fh.flush()
+
+    def metadata(self, persona: dict, job: str) -> None:
+        self._write({
+            "type"                : "metadata",
+            "input_documents"     : sorted(self._names),
+            "persona"             : persona,
+            "job_to_be_done"      : job,
+            "processing_timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        })
+
+    def document(self, i: int, sections: List[dict]) -> None:
+        """extract_many() on_doc callback: outline of one finished PDF."""
+        self.counts["documents"] += 1
+        self._write({
+            "type"    : "document",
+            "doc_id"  : f"doc{i + 1}",
+            "document": self._names[i],
+            "sections": [
+                {"heading": s["heading"], "level": s["level"],
+                 "page_start": s["page_start"], "page_end": s["page_end"]}
+                for s in sections
+            ],
+        })
+
+    def ranked(self, top_sections: List[dict]) -> None:
+        for sec in top_sections:
+            self.counts["extracted_sections"] += 1
+            self._write({"type": "extracted_section", **sec})
+
+    def refined(self, sub_analysis: List[dict]) -> None:
+        for sub in sub_analysis:
+            self.counts["sub_section_analysis"] += 1
+            self._write({"type": "sub_section_analysis", **sub})
+
+    def close(self, **extra) -> None:
+        if self._fh.closed:
+            return
+        self._write({"type": "summary", **self.counts,
+                     "elapsed_sec": round(time.perf_counter() - self._t0, 3), **extra})
+        self._fh.close()
+
+    def write_result(self, out_json: dict) -> None:
+        """Whole-result fallback (batch mode): the same records without per-document lines."""
+        meta = dict(out_json["metadata"])
+        extra = {k: meta.pop(k) for k in ("trace", "deadline") if k in meta}
+        self._write({"type": "metadata", **meta})
+        self.ranked(out_json["extracted_sections"])
+        self.refined(out_json["sub_section_analysis"])
+        self.close(**extra)
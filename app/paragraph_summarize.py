@@ -1,50 +1,110 @@
 # app/paragraph_summarize.py
-from typing import List, Dict, Any
-import re, networkx as nx
-from sentence_transformers import util
-from .ranker import _get_model as get_model
+from typing import List, Dict, Any, Sequence
+import re
+import numpy as np
+from .ranker   import _embed
+from .textrank import textrank_scores
+from .trace    import span, traced
 
 _SENT_SPLIT = re.compile(r'(?<=[.!?。！？])\s+')
 
-def _textrank(sentences: List[str], top_n: int = 2) -> str:
-    """Simple TextRank over sentence embeddings."""
+# ──────────────────────────────────────────────────────────────
+class _VecTable:
+    """
+    One batched encode for many (possibly repeated) texts; rows looked up by text.
+    A shared `memo` (text → vector) skips texts encoded by an earlier table.
+    """
+    def __init__(self, texts: Sequence[str], memo: Dict[str, np.ndarray] | None = None):
+        self.memo = {} if memo is None else memo
+        new = [t for t in dict.fromkeys(texts) if t not in self.memo]
+        if new:
+            self.memo.update(zip(new, _embed(new)))
+
+    def __call__(self, texts: Sequence[str]) -> np.ndarray:
+        return np.stack([self.memo[t] for t in texts])
+
+def _top_sentences(sentences: List[str], scores: np.ndarray, top_n: int) -> str:
+    ranked = sorted(zip(scores.tolist(), sentences), reverse=True)
+    return " ".join(s for _, s in ranked[:top_n])
+
+@traced("textrank")
+def _textrank(sentences: List[str], top_n: int = 2, embs: np.ndarray | None = None) -> str:
+    """Simple TextRank over sentence embeddings (PageRank on the cosine graph)."""
     if len(sentences) <= top_n:
         return " ".join(sentences)
-    mdl  = get_model()
-    embs = mdl.encode(sentences, convert_to_tensor=True, normalize_embeddings=True)
-    sim  = util.cos_sim(embs, embs).cpu().numpy()
-    scores = nx.pagerank(nx.from_numpy_array(sim))
-    ranked = sorted(((scores[i], s) for i, s in enumerate(sentences)), reverse=True)
-    return " ".join(s for _, s in ranked[:top_n])
+    if embs is None:
+        embs = _embed(sentences)
+    return _top_sentences(sentences, textrank_scores([embs])[0], top_n)
 
-def refine_section(section: Dict[str, Any], query: str, k_paragraphs: int = 3) -> Dict[str, Any] | None:
+# ──────────────────────────────────────────────────────────────
+@traced("refine")
+def refine_sections(
+    sections: List[Dict[str, Any]],
+    query: str,
+    k_paragraphs: int = 3,
+    top_n: int = 2,
+    memo: Dict[str, np.ndarray] | None = None,
+    budget=None,
+    max_candidates: int | None = None,
+) -> List[Dict[str, Any] | None]:
     """
-    section["paragraphs"] produced by extractor ⇒ [{page:int, text:str}, …]
+    Batched refine_section() over many sections: the query and every candidate
+    paragraph are encoded in one pass, then the sentences of all selected
+    paragraphs in a second pass; all similarities come from those two matrices,
+    and TextRank runs once over all selected paragraphs (block-diagonal).
+    Pass the same `memo` across calls (e.g. several personas) to encode each
+    paragraph / sentence only once. With a deadline `budget` (app.deadline)
+    that has no time left for the sentence pass, refined_text falls back to
+    the leading sentences. `max_candidates` – only a section's first n
+    candidate paragraphs are encoded and compared with the query.
     """
-    paras_all = [p for p in section["paragraphs"] if len(p["text"]) > 30]
-    if not paras_all:
-        return None
-
-    mdl   = get_model()
-    q_emb = mdl.encode(query, convert_to_tensor=True, normalize_embeddings=True)
-    p_emb = mdl.encode([p["text"] for p in paras_all],
-                       convert_to_tensor=True, normalize_embeddings=True)
-    sims = util.cos_sim(q_emb, p_emb)[0].cpu().tolist()
-    top_idx = sorted(range(len(sims)), key=lambda i: sims[i], reverse=True)[:k_paragraphs]
-
-    subsections = []
-    for rk, i in enumerate(top_idx, 1):
-        para = paras_all[i]
-        refined = _textrank(_SENT_SPLIT.split(para["text"]))
-        subsections.append({
-            "rank"         : rk,
-            "raw_paragraph": para["text"][:800],
-            "refined_text" : refined,
-            "page_number"  : para["page"]      # ← exact PDF page!
+    paras_per_sec = [[p for p in s["paragraphs"] if len(p["text"]) > 30][:max_candidates] for s in sections]
+
+    para_vecs = _VecTable([query] + [p["text"] for paras in paras_per_sec for p in paras], memo)
+    q_emb     = para_vecs([query])[0]
+
+    picked: List[List[Dict[str, Any]]] = []
+    for paras in paras_per_sec:
+        if not paras:
+            picked.append([])
+            continue
+        sims    = (para_vecs([p["text"] for p in paras]) @ q_emb).tolist()
+        top_idx = sorted(range(len(sims)), key=lambda i: sims[i], reverse=True)[:k_paragraphs]
+        picked.append([paras[i] for i in top_idx])
+
+    split   = {p["text"]: _SENT_SPLIT.split(p["text"]) for paras in picked for p in paras}
+    refined = {text: " ".join(sents) for text, sents in split.items() if len(sents) <= top_n}
+    long    = [text for text, sents in split.items() if len(sents) > top_n]
+    if long and budget is not None and not budget.allow_textrank(sum(len(split[t]) for t in long)):
+        refined.update((text, " ".join(split[text][:top_n])) for text in long)
+    elif long:
+        sent_vecs = _VecTable([s for text in long for s in split[text]], memo)
+        with span("textrank", paragraphs=len(long)):
+            scores = textrank_scores([sent_vecs(split[text]) for text in long])
+            refined.update((text, _top_sentences(split[text], sc, top_n)) for text, sc in zip(long, scores))
+
+    results: List[Dict[str, Any] | None] = []
+    for section, paras in zip(sections, picked):
+        if not paras:
+            results.append(None)
+            continue
+        subsections = []
+        for rk, para in enumerate(paras, 1):
+            subsections.append({
+                "rank"         : rk,
+                "raw_paragraph": para["text"][:800],
+                "refined_text" : refined[para["text"]],
+                "page_number"  : para["page"]      # ← exact PDF page!
+            })
+        results.append({
+            "document"     : section["doc_name"],
+            "section_title": section["heading"],
+            "subsections"  : subsections
         })
+    return results
 
-    return {
-        "document"     : section["doc_name"],
-        "section_title": section["heading"],
-        "subsections"  : subsections
-    }
\ No newline at end of file
+def refine_section(section: Dict[str, Any], query: str, k_paragraphs: int = 3) -> Dict[str, Any] | None:
+    """
+    section["paragraphs"] produced by extractor ⇒ [{page:int, text:str}, …]
+    """
+    return refine_sections([section], query, k_paragraphs)[0]
@@ -0,0 +1,92 @@
+# app/parallel.py
+"""
+Process-pool extraction across input PDFs.
+
+Documents are submitted largest-first (by page count) so one long PDF does
+not leave the other workers idle at the end; results are returned in the
+original doc order regardless of completion order. Workers come from a
+forkserver, so a model preload thread in the parent is never forked.
+"""
+import os, sys, pathlib
+import multiprocessing as mp
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Callable, List, Sequence
+
+from . import trace
+from .config import Config
+from .pdf_loader import count_pages
+from .extract_outline_and_sections import extract, Section
+from .section_store import SectionStore
+
+_THREAD_ENV_VARS = (
+    "OMP_NUM_THREADS",
+    "OPENBLAS_NUM_THREADS",
+    "MKL_NUM_THREADS",
+    "NUMEXPR_NUM_THREADS",
+    "VECLIB_MAXIMUM_THREADS",
+)
+
+# ──────────────────────────────────────────────────────────────
+def limit_threads(n: int = 1) -> None:
+    """Pool initializer: keep every worker to n torch / BLAS threads."""
+    for var in _THREAD_ENV_VARS:
+        os.environ[var] = str(n)
+    torch = sys.modules.get("torch")      # only if something imported it already
+    if torch is not None:
+        torch.set_num_threads(n)
+
+def _init_worker(n_threads: int) -> None:
+    limit_threads(n_threads)
+    Config.SHARD_WORKERS = 1              # no nested page-shard pools inside a doc worker
+
+def _page_count(pdf_path: pathlib.Path) -> int:
+    try:
+        return count_pages(str(pdf_path))
+    except Exception:
+        return 0                          # unreadable → schedule last, let extract() raise
+
+# ──────────────────────────────────────────────────────────────
+def extract_many(
+    pdf_paths: Sequence[pathlib.Path],
+    workers: int | None = None,
+    on_doc: Callable[[int, List[Section]], None] | None = None,
+) -> SectionStore:
+    """
+    Extract every PDF as doc1..docN (in the given order) into one SectionStore,
+    sections in that same order. `on_doc(i, sections)` is called with the
+    extractor dicts as each document finishes (completion order, i = 0-based
+    position).
+    """
+    paths   = [pathlib.Path(p) for p in pdf_paths]
+    doc_ids = [f"doc{idx}" for idx in range(1, len(paths) + 1)]
+    workers = min(workers or Config.EXTRACT_WORKERS, len(paths))
+
+    if workers <= 1:
+        store = SectionStore()
+        for i, (pdf_path, doc_id) in enumerate(zip(paths, doc_ids)):
+            doc_sections = extract(pdf_path, doc_id)
+            if on_doc is not None:
+                on_doc(i, doc_sections)
+            store.add_document(doc_id, pdf_path.name, doc_sections)
+        return store
+
+    # largest first; sorted() is stable so equal sizes keep doc order
+    sizes = [_page_count(p) for p in paths]
+    order = sorted(range(len(paths)), key=lambda i: -sizes[i])
+
+    results: List[List[Section]] = [[] for _ in paths]
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=mp.get_context("forkserver"),
+        initializer=_init_worker,
+        initargs=(Config.WORKER_THREADS,),
+    ) as ex:
+        st = trace.state()                # workers send their spans back with the sections
+        futures = {ex.submit(trace.call_collect, st, extract, paths[i], doc_ids[i]): i for i in order}
+        for fut in as_completed(futures):
+            i = futures[fut]
+            results[i] = trace.absorb(*fut.result())
+            if on_doc is not None:
+                on_doc(i, results[i])
+
+    return SectionStore.from_documents(zip(doc_ids, (p.name for p in paths), results))
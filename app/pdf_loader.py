@@ -1,10 +1,15 @@
 # app/pdf_loader.py
 import fitz                       # PyMuPDF
 from dataclasses import dataclass
-from typing import List
+from typing import Iterator, List, Optional, Tuple
 
 # ───────── your existing Line dataclass (already defined in app/layout.py) ────
-from .layout import Line          # <- page, text, x0, y0, x1, y1, avg_size, bold_frac
+from .layout import Line, page_lines   # <- page, text, x0, y0, x1, y1, avg_size, bold_frac
+from .config import Config
+from .trace  import span
+
+# text-only "dict" extraction: image blocks (and their raw bytes) are never built
+_TEXT_FLAGS = fitz.TEXTFLAGS_DICT & ~fitz.TEXT_PRESERVE_IMAGES
 
 # ───────── page / document containers ────────────────────────────────────────
 @dataclass
@@ -12,8 +17,9 @@ class PageContext:
     index:   int
     width:   float
     height:  float
-    raw_dict: dict                 # original PyMuPDF dict
+    raw_dict: Optional[dict]       # original PyMuPDF dict (None when streamed)
     lines:   List[Line]           # fully flattened line list
+    spans:   Optional[List[list]] = None   # raw spans per line (DEBUG=1 only)
 
 @dataclass
 class DocumentContext:
@@ -52,9 +58,6 @@ def _extract_lines(page_dict: dict, page_index: int) -> List[Line]:
                     y0        = y0,
                     x1        = x1,
                     y1        = y1,
-                    spans     = spans,
-                    font_sizes= [s["size"] for s in spans],
-                    primary_font = spans[0].get("font", "") if spans else "",
                     avg_size  = avg_size,
                     bold_frac = bold_frac,
                 )
@@ -83,4 +86,42 @@ def load_document(pdf_path: str) -> DocumentContext:
         path       = pdf_path,
         page_count = doc.page_count,
         pages      = pages,
-    )
\ No newline at end of file
+    )
+
+def count_pages(pdf_path: str) -> int:
+    with fitz.open(pdf_path) as doc:
+        return doc.page_count
+
+# ───────── streaming loader (one parse per page, raw dict dropped) ───────────
+def iter_pages(pdf_path: str, start: int = 0, stop: Optional[int] = None) -> Iterator[PageContext]:
+    """
+    Yield one PageContext per page in [start, stop) with its final, sorted Line list.
+    The PyMuPDF dict is parsed once and released before the next page is read.
+    """
+    with fitz.open(pdf_path) as doc:
+        stop = doc.page_count if stop is None else min(stop, doc.page_count)
+        for i in range(start, stop):
+            with span("load", page=i):
+                page = doc.load_page(i)
+                raw  = page.get_text("dict", flags=_TEXT_FLAGS)
+            spans = [] if Config.INCLUDE_DEBUG else None
+            with span("build_lines", page=i):
+                lines = page_lines(raw, i, spans)
+            yield PageContext(
+                index    = i,
+                width    = page.rect.width,
+                height   = page.rect.height,
+                raw_dict = None,
+                lines    = lines,
+                spans    = spans,
+            )
+            del raw, page
+
+def load_lines(pdf_path: str) -> Tuple[List[Line], int]:
+    """Drop-in for load_document() + build_lines(): returns (lines, page_count)."""
+    lines: List[Line] = []
+    page_count = 0
+    for page_ctx in iter_pages(pdf_path):
+        lines.extend(page_ctx.lines)
+        page_count += 1
+    return lines, page_count
@@ -1,29 +1,111 @@
-import time, pathlib, json, tempfile
+import time, pathlib, json, tempfile, resource, sys, tracemalloc
+import multiprocessing as mp
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
 from reportlab.pdfgen import canvas
 from reportlab.lib.pagesizes import A4
-from .pdf_loader import load_document
-from .layout import build_lines
+from .pdf_loader import load_document, load_lines, iter_pages
+from .config import Config
+from .layout import Line, build_lines, _is_span_bold
 from .features import compute_features
 from .level_assign import assign_levels
 from .scoring import score_candidate
+from .extract_outline_and_sections import _build_sections
 
-def synth_pdf(path: str, pages=50):
+_FONT_DIRS = (pathlib.Path(__file__).resolve().parents[1] / "assets" / "fonts", pathlib.Path("/app/fonts"))
+_SCRIPTS = {   # script → (font file or None for a built-in CID font, heading, body sentence)
+    "arabic":     ("NotoSansArabic-Regular.ttf",     "الفصل {n} مقدمة في التحليل",  "تحليل السوق والنمو في الربع الأخير من العام"),
+    "devanagari": ("NotoSansDevanagari-Regular.ttf", "अध्याय {n} बाजार विश्लेषण",     "पिछली तिमाही में बाजार की वृद्धि और निवेश"),
+    "cjk":        (None,                             "第{n}章 市場の概要と分析",          "前四半期の市場成長と投資戦略について"),
+}
+_WORDS = ("revenue market growth strategy investment analysis policy digital library planning "
+          "budget risk research product customer operations travel cuisine history coastal").split()
+
+def _script_font(script: str) -> str:
+    """Register the font for `script` with reportlab once; returns its name."""
+    from reportlab.pdfbase import pdfmetrics
+    from reportlab.pdfbase.ttfonts import TTFont
+    from reportlab.pdfbase.cidfonts import UnicodeCIDFont
+    file = _SCRIPTS[script][0]
+    if file is None:
+        if "HeiseiMin-W3" not in pdfmetrics.getRegisteredFontNames():
+            pdfmetrics.registerFont(UnicodeCIDFont("HeiseiMin-W3"))
+        return "HeiseiMin-W3"
+    name = file.split("-")[0]
+    if name not in pdfmetrics.getRegisteredFontNames():
+        path = next((d / file for d in _FONT_DIRS if (d / file).exists()), None)
+        if path is None:
+            raise FileNotFoundError(f"{file} not found in {[str(d) for d in _FONT_DIRS]}")
+        pdfmetrics.registerFont(TTFont(name, str(path)))
+    return name
+
+def synth_pdf(path: str, pages=50, headings=1.0, columns=1, script="latin", seed=0):
+    """
+    Synthetic report: title on page 1, `headings` numbered H1/H2 headings per page
+    (fractional → one every 1/headings pages) over `columns` text columns, 20 body
+    lines per column. script ≠ latin interleaves headings and body lines in that script.
+    """
+    import random
     from reportlab.pdfgen import canvas
     from reportlab.lib.pagesizes import A4
     w,h=A4
+    rng=random.Random(seed)
+    font=_script_font(script) if script!="latin" else None
+    colw=(w-144)/columns
+    n_head=0
     c=canvas.Canvas(path,pagesize=A4)
     for p in range(1,pages+1):
         if p==1:
             c.setFont("Helvetica-Bold",22); c.drawString(72,h-80,"Synthetic Benchmark Title")
-        c.setFont("Helvetica-Bold",16); c.drawString(72,h-140,f"{p} Section Heading")
-        c.setFont("Helvetica",12)
-        y = h-170
-        for i in range(20):
-            c.drawString(72,y,f"Body line {i+1} on page {p}.")
-            y -= 14
+        due=int(p*headings)-int((p-1)*headings)             # headings on this page
+        for col in range(columns):
+            x,y=72+col*colw,h-140
+            mine=due//columns+(col<due%columns)
+            per=20//max(mine,1)
+            for i in range(20):
+                if mine and i%per==0 and i//per<mine:
+                    n_head+=1
+                    if font and n_head%2==0:
+                        c.setFont(font,16); c.drawString(x,y,_SCRIPTS[script][1].format(n=n_head))
+                    else:
+                        sub=n_head%3==0
+                        c.setFont("Helvetica-Bold",13 if sub else 16)
+                        c.drawString(x,y,f"{n_head}{'.1' if sub else ''} "+" ".join(rng.choice(_WORDS) for _ in range(3)).title())
+                    y-=30
+                if font and i%4==3:
+                    c.setFont(font,12); c.drawString(x,y,_SCRIPTS[script][2])
+                else:
+                    c.setFont("Helvetica",12)
+                    c.drawString(x,y," ".join(rng.choice(_WORDS) for _ in range(max(3,int(colw/48)))).capitalize()+".")
+                y-=14
         c.showPage()
     c.save()
 
+def _run_loader(kind: str, path: str) -> dict:
+    """Run one loader in a fresh process; ru_maxrss is KiB on Linux."""
+    base = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    t0 = time.perf_counter()
+    if kind == "legacy":
+        n_lines = len(build_lines(load_document(path)))
+    else:
+        n_lines = len(load_lines(path)[0])
+    wall = time.perf_counter() - t0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return {
+        "wall_sec": round(wall, 3),
+        "peak_rss_mb": round(peak / 1024, 1),
+        "rss_growth_mb": round((peak - base) / 1024, 1),
+        "lines": n_lines,
+    }
+
+def compare_loaders(path: str) -> dict:
+    """legacy = load_document + build_lines, streaming = load_lines."""
+    out = {}
+    for kind in ("legacy", "streaming"):
+        with ProcessPoolExecutor(max_workers=1, mp_context=mp.get_context("spawn")) as ex:
+            out[kind] = ex.submit(_run_loader, kind, path).result()
+    return out
+
 def main():
     tmp = pathlib.Path("/app/input/benchmark.pdf")
     if not tmp.exists():
@@ -35,7 +117,7 @@ def main():
     t2 = time.time()
     feats = compute_features(lines, doc.page_count)
     t3 = time.time()
-    cand = [f for f in feats if f["candidate_heading"]]
+    cand = feats.candidates()
     t4 = time.time()
     enriched = []
     for f in cand:
@@ -69,8 +151,285 @@ def main():
         },
         "page_count": doc.page_count,
         "candidates": len(cand),
-        "assigned": len(assigned)
+        "assigned": len(assigned),
+        "loader": compare_loaders(str(tmp))
     }, indent=2))
 
+def _synth_layout(n_lines: int, lines_per_page: int = 50, heading_every: int = 40):
+    """Synthetic sorted lines + reading-order headings (H1/H2/H3 cycle) for segmentation."""
+    lines = [
+        Line(page=i // lines_per_page, text=f"Body line {i}.", x0=72.0,
+             y0=72.0 + (i % lines_per_page) * 14.0, x1=400.0, y1=84.0 + (i % lines_per_page) * 14.0)
+        for i in range(n_lines)
+    ]
+    headings = [
+        {"page": ln.page, "y0": ln.y0, "text": f"Heading {k}",
+         "proposed_level": ("H1", "H2", "H3", "H2", "H3")[k % 5]}
+        for k, ln in enumerate(lines[::heading_every])
+    ]
+    return lines, headings
+
+def bench_segmentation(sizes=(10_000, 50_000, 100_000, 250_000, 500_000)) -> dict:
+    """_build_sections() wall time vs line count; µs/line should stay flat."""
+    out = {}
+    for n in sizes:
+        lines, headings = _synth_layout(n)
+        t0 = time.perf_counter()
+        secs = _build_sections(lines, headings, "doc1", "synthetic.pdf")
+        dt = time.perf_counter() - t0
+        out[n] = {
+            "headings": len(headings),
+            "sections": len(secs),
+            "sec": round(dt, 3),
+            "us_per_line": round(dt / n * 1e6, 2),
+        }
+    return out
+
+def check_features(pdf_dir: str = "/app/input") -> dict:
+    """Columnar compute_features() vs the frozen dict-per-line version: same candidates, faster."""
+    from bench.features_reference import compute_features_reference   # repository checkout only
+    out = {}
+    for pdf in sorted(pathlib.Path(pdf_dir).glob("*.pdf")):
+        lines, page_count = load_lines(str(pdf))
+        t0 = time.perf_counter()
+        ref = compute_features_reference(lines, page_count)
+        t1 = time.perf_counter()
+        table = compute_features(lines, page_count)
+        t2 = time.perf_counter()
+        out[pdf.name] = {
+            "lines": len(lines),
+            "identical": [f["candidate_heading"] for f in ref] == table.candidate.tolist()
+                         and [f for f in ref if f["candidate_heading"]] == table.candidates(),
+            "survivor_frac": round(len(table.rows) / max(len(lines), 1), 3),
+            "reference_sec": round(t1 - t0, 3),
+            "columnar_sec": round(t2 - t1, 3),
+            "speedup": round((t1 - t0) / max(t2 - t1, 1e-9), 1),
+        }
+    return out
+
+def _retained(build):
+    """(result, bytes still allocated by build() once it returns)."""
+    tracemalloc.start()
+    try:
+        out = build()
+        return out, tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+
+def _lines_with_spans(path: str):
+    debug, Config.INCLUDE_DEBUG = Config.INCLUDE_DEBUG, True
+    try:
+        pages = list(iter_pages(path))
+        return [ln for p in pages for ln in p.lines], [sp for p in pages for sp in p.spans]
+    finally:
+        Config.INCLUDE_DEBUG = debug
+
+@dataclass
+class _BaselineLine:
+    """The Line of the previous layout.py: a plain dataclass carrying its spans and derived lists."""
+    page: int
+    text: str
+    x0: float
+    y0: float
+    x1: float
+    y1: float
+    spans: list = field(default_factory=list)
+    font_sizes: list = field(default_factory=list)
+    primary_font: str = ""
+    avg_size: float = 0.0
+    bold_frac: float = 0.0
+
+def _baseline_lines(path: str) -> list:
+    """The previous build_lines() over the same pages: every line keeps its raw PyMuPDF spans."""
+    import fitz
+    lines = []
+    with fitz.open(path) as doc:
+        for i, page in enumerate(doc):
+            for blk in page.get_text("dict").get("blocks", []):
+                if blk.get("type", 0) != 0:
+                    continue
+                for l in blk.get("lines", []):
+                    spans = l.get("spans", [])
+                    text  = "".join(sp.get("text", "") for sp in spans).strip()
+                    if not spans or not text:
+                        continue
+                    sizes = [float(sp.get("size", 0)) for sp in spans]
+                    bolds = [_is_span_bold(sp.get("font", "")) for sp in spans]
+                    lines.append(_BaselineLine(
+                        page=i, text=text,
+                        x0=min(sp["bbox"][0] for sp in spans), y0=min(sp["bbox"][1] for sp in spans),
+                        x1=max(sp["bbox"][2] for sp in spans), y1=max(sp["bbox"][3] for sp in spans),
+                        spans=spans, font_sizes=sizes, primary_font=spans[0].get("font", ""),
+                        avg_size=sum(sizes) / len(sizes), bold_frac=sum(bolds) / len(bolds),
+                    ))
+    lines.sort(key=lambda ln: (ln.page, ln.y0, ln.x0))
+    return lines
+
+def bench_line_memory(pdf: str = "/app/input/benchmark.pdf") -> dict:
+    """Bytes per line kept by the loader: previous Line (with span copies) vs compact Line,
+    and compact Line + DEBUG span side table."""
+    if not pathlib.Path(pdf).exists():
+        synth_pdf(pdf)
+    before, before_bytes = _retained(lambda: _baseline_lines(pdf))
+    (lines, _), compact  = _retained(lambda: load_lines(pdf))
+    (_, _), with_spans   = _retained(lambda: _lines_with_spans(pdf))
+    n, nb = max(len(lines), 1), max(len(before), 1)
+    return {
+        "lines": len(lines),
+        "lines_before": len(before),
+        "bytes_per_line_before": round(before_bytes / nb),
+        "bytes_per_line": round(compact / n),
+        "bytes_per_line_debug_spans": round(with_spans / n),
+        "saving": round(1 - (compact / n) / max(before_bytes / nb, 1), 3),
+    }
+
+def _synth_candidates(n: int, per_page: int = 25) -> list:
+    """Slide-deck / legal-code shaped candidates: numbered, ALL-CAPS, split numbers, mixed sizes."""
+    out = []
+    for i in range(n):
+        k = i % 7
+        text = (f"{i // 7 % 9 + 1}.{k} Clause {i}" if k in (1, 2) else
+                f"{i // 7 % 9 + 1}" if k == 3 else
+                f"SECTION {i}" if k == 4 else f"Heading {i}")
+        size = (18.0, 14.0, 12.5, 12.5, 16.0, 12.0, 12.0)[k]
+        out.append({
+            "page": i // per_page + 1, "y0": 40.0 + (i % per_page) * 30.0, "text": text,
+            "avg_size": size, "rel_font_size": round(size / 11.0, 3), "is_bold": k != 5,
+            "starts_numbering": k in (1, 2, 3), "gap_above": (1.5, 8.0, 2.5)[i % 3], "score": 1.0,
+        })
+    return out
+
+def bench_level_assign(sizes=(1_000, 5_000, 10_000, 50_000)) -> dict:
+    """assign_levels() wall time vs candidate count; µs/candidate should stay flat."""
+    out = {}
+    for n in sizes:
+        cands = _synth_candidates(n)
+        t0 = time.perf_counter()
+        assigned, _ = assign_levels(cands, n // 25 + 1)
+        dt = time.perf_counter() - t0
+        out[n] = {
+            "assigned": len(assigned),
+            "sec": round(dt, 3),
+            "us_per_candidate": round(dt / n * 1e6, 2),
+        }
+    return out
+
+# ── text normalisation: the previous text_utils, kept verbatim for bench_text() ──
+_REF_DIGITS = (str.maketrans("０１２３４５６７８９", "0123456789"), str.maketrans("٠١٢٣٤٥٦٧٨٩", "0123456789"),
+               str.maketrans("۰۱۲۳۴۵۶۷۸۹", "0123456789"), str.maketrans("०१२३४५६७८९", "0123456789"))
+
+def _ref_normalize_all_digits(s: str) -> str:
+    for table in _REF_DIGITS:
+        s = s.translate(table)
+    return s
+
+def _ref_script_ratios(s: str):
+    counts = {"latin":0,"cjk":0,"arabic":0,"devanagari":0,"other":0}
+    total = 0
+    for ch in s:
+        if ch.isspace():
+            continue
+        if not ch.isprintable():
+            continue
+        total += 1
+        o = ord(ch)
+        if 0x0041 <= o <= 0x024F:
+            counts["latin"] += 1
+        elif 0x4E00 <= o <= 0x9FFF or 0x3400 <= o <= 0x4DBF or 0x3040 <= o <= 0x30FF or 0xFF00 <= o <= 0xFFEF:
+            counts["cjk"] += 1
+        elif 0x0600 <= o <= 0x06FF or 0x0750 <= o <= 0x077F or 0x08A0 <= o <= 0x08FF:
+            counts["arabic"] += 1
+        elif 0x0900 <= o <= 0x097F:
+            counts["devanagari"] += 1
+        else:
+            counts["other"] += 1
+    if total == 0:
+        return {k:0.0 for k in counts}
+    return {k: v/total for k,v in counts.items()}
+
+def _ref_normalize_rtl(text: str) -> str:
+    if not any('\u0600' <= ch <= '\u06FF' for ch in text):
+        return text
+    try:
+        import arabic_reshaper, bidi.algorithm as ba
+        return ba.get_display(arabic_reshaper.reshape(text))
+    except Exception:
+        return text
+
+def _synth_text_lines(script: str, n: int, seed: int = 0) -> list:
+    """PDF-line-like strings: headings with (native) numbering, body text, a running header every 40 lines."""
+    import random
+    rng = random.Random(seed)
+    if script == "latin":
+        heading, body = "{n} Chapter Overview", " ".join(_WORDS)
+    else:
+        _, heading, body = _SCRIPTS[script]
+    words   = body.split()
+    native  = {"arabic": "٠١٢٣٤٥٦٧٨٩", "devanagari": "०१२३४५६७८९", "cjk": "０１２３４５６７８９"}.get(script, "0123456789")
+    header  = heading.format(n="").strip() + " – 2024"
+    out = []
+    for i in range(n):
+        if i % 40 == 0:
+            out.append(header)
+        elif i % 9 == 0:
+            num = "".join(rng.choice(native) for _ in range(rng.randint(1, 2)))
+            out.append(heading.format(n=num))
+        else:
+            out.append(" ".join(rng.choice(words) for _ in range(rng.randint(3, 12))) + ".")
+    return out
+
+def bench_text(n_lines: int = 20_000) -> dict:
+    """Per script: µs/line for rtl + digits + script ratios (the compute_features calls), previous vs current."""
+    from . import text_utils as tu
+    from .features import _rtl_normalizer
+    out = {}
+    for script in ("latin", "arabic", "devanagari", "cjk"):
+        lines = _synth_text_lines(script, int(n_lines))
+
+        t0  = time.perf_counter()
+        ref = []
+        for ln in lines:
+            raw = _ref_normalize_rtl(ln.strip())
+            ref.append((raw, _ref_normalize_all_digits(raw), _ref_script_ratios(raw)))
+        t_ref = time.perf_counter() - t0
+
+        tu._reorder.cache_clear()
+        t0  = time.perf_counter()
+        rtl = _rtl_normalizer(tu.doc_scripts(lines))
+        cur = []
+        for ln in lines:
+            raw = rtl(ln.strip())
+            cur.append((raw, tu.normalize_all_digits(raw), tu.script_ratios(raw)))
+        t_cur = time.perf_counter() - t0
+
+        out[script] = {
+            "lines"        : len(lines),
+            "identical"    : ref == cur,
+            "previous_us"  : round(t_ref / len(lines) * 1e6, 2),
+            "current_us"   : round(t_cur / len(lines) * 1e6, 2),
+            "speedup"      : round(t_ref / max(t_cur, 1e-9), 1),
+        }
+    return out
+
+_BENCHES = {                       # name → (bench, takes its numeric arguments as one list of sizes)
+    "segment":  (bench_segmentation, True),
+    "features": (check_features,     False),
+    "memory":   (bench_line_memory,  False),
+    "levels":   (bench_level_assign, True),
+    "text":     (bench_text,         False),
+}
+
+def _run_bench(name: str, argv: list) -> dict:
+    """CLI arguments are parsed once here: integers become int, sized benches get them as a list."""
+    bench, sized = _BENCHES[name]
+    args = [int(a) if a.isdigit() else a for a in argv]
+    return bench(args) if sized and args else bench(*args)
+
 if __name__ == "__main__":
-    main()
+    if len(sys.argv) > 1:
+        if sys.argv[1] not in _BENCHES:
+            print(f"Usage: python -m app.perf [{'|'.join(_BENCHES)}] [args…]")
+            sys.exit(2)
+        print(json.dumps(_run_bench(sys.argv[1], sys.argv[2:]), indent=2))
+    else:
+        main()
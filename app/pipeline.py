@@ -0,0 +1,161 @@
+# app/pipeline.py
+"""
+Round-1B pipeline as plain functions, shared by main.py (one run per
+container) and server.py (long-running, warm model):
+
+    extract_many(pdfs)  →  rank_and_refine(sections, persona, job)  →  result JSON
+
+The ranking stack (numpy / BM25 / TextRank / encoder) is imported on first
+use, so callers can overlap those imports with PDF parsing.
+"""
+from __future__ import annotations
+import pathlib, time
+from contextlib import nullcontext
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from .deadline      import Budget
+from .parallel      import extract_many
+from .section_store import SectionStore
+from .extract_outline_and_sections import Section
+
+# ──────────────────────────────────────────────────────────────
+def rank_and_refine(
+    sections: SectionStore,
+    persona : dict,
+    job     : str,
+    timings : Optional[Dict[str, float]] = None,
+    on_ranked: Optional[Callable[[List[dict]], None]] = None,
+    budget  : Optional[Budget] = None,
+) -> dict:
+    """
+    Rank `sections` for persona/job, refine the top ones, return the result JSON.
+    `on_ranked(top_sections)` fires before the (slower) paragraph refinement.
+    With a deadline `budget` the degradations it applies are recorded in
+    metadata.deadline.
+    """
+    from .encoder             import get_encoder
+    from .ranker              import rank_sections, build_query, encoded_count
+    from .paragraph_summarize import refine_sections
+    query = build_query(persona, job)
+
+    t_wait = time.perf_counter()
+    with _stage(budget, "model_wait"):
+        get_encoder()                     # only the load time not hidden by parsing
+    if timings is not None:
+        timings["model_wait"] = time.perf_counter() - t_wait
+
+    # rank sections (dense + BM25 fusion)
+    keep_top, payload_chars = 15, 400
+    if budget is not None:
+        budget.plan_rank(len(sections), len(sections.para_page) / len(sections))
+        keep_top, payload_chars = budget.keep_top, budget.payload_chars
+    t_rank, n_enc = time.perf_counter(), encoded_count()
+    with _stage(budget, "rank"):
+        top_secs, top_ids = rank_sections(sections, persona, job, keep_top=keep_top,
+                                          payload_chars=payload_chars)
+    if budget is not None:
+        budget.observe_encode(encoded_count() - n_enc, time.perf_counter() - t_rank)   # cascade / caches
+    if on_ranked is not None:
+        on_ranked(top_secs)
+
+    # paragraph-level refinement, batched over all top sections
+    targets, k_paragraphs, max_cands = [sections[i] for i in top_ids], 3, None
+    if budget is not None:
+        cands   = sum(len(p["text"]) > 30 for s in targets for p in s["paragraphs"])
+        targets = targets[: budget.plan_refine(len(targets), cands)]
+        k_paragraphs, max_cands = budget.k_paragraphs, budget.max_candidates
+    with _stage(budget, "refine"):
+        sub_analysis = [r for r in refine_sections(targets, query, k_paragraphs, budget=budget,
+                                                   max_candidates=max_cands) if r]
+    out = _result_json(sections, persona, job, top_secs, sub_analysis)
+    if budget is not None:
+        out["metadata"]["deadline"] = budget.metadata()
+    return out
+
+def rank_and_refine_many(
+    sections    : SectionStore,
+    persona_jobs: Sequence[Tuple[dict, str]],
+    timings     : Optional[Dict[str, float]] = None,
+) -> List[dict]:
+    """
+    rank_and_refine() for several persona/job pairs over one corpus: sections
+    and queries are embedded once, and paragraph / sentence vectors are shared
+    between personas, so each extra persona only adds its own query cost.
+    """
+    from .encoder             import get_encoder
+    from .ranker              import rank_sections_many, build_query
+    from .paragraph_summarize import refine_sections
+
+    t_wait = time.perf_counter()
+    get_encoder()
+    if timings is not None:
+        timings["model_wait"] = time.perf_counter() - t_wait
+
+    memo: dict = {}                       # text → vector, shared by all personas
+    results = []
+    for (persona, job), (top_secs, top_ids) in zip(persona_jobs,
+                                                  rank_sections_many(sections, persona_jobs, keep_top=15)):
+        refined = refine_sections([sections[i] for i in top_ids], build_query(persona, job), memo=memo)
+        results.append(_result_json(sections, persona, job, top_secs, [r for r in refined if r]))
+    return results
+
+def _stage(budget: Optional[Budget], name: str):
+    return budget.stage(name) if budget is not None else nullcontext()
+
+def _result_json(sections: SectionStore, persona: dict, job: str,
+                 top_secs: List[dict], sub_analysis: List[dict]) -> dict:
+    return {
+        "metadata": {
+            "input_documents"     : sorted({sections.doc_names[d] for d in set(sections.doc)}),
+            "persona"             : persona,
+            "job_to_be_done"      : job,
+            "processing_timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        },
+        "extracted_sections"  : top_secs,
+        "sub_section_analysis": sub_analysis,
+    }
+
+def _extract(
+    pdf_paths: Sequence[pathlib.Path],
+    timings  : Optional[Dict[str, float]],
+    on_doc   : Optional[Callable[[int, List[Section]], None]],
+) -> SectionStore:
+    def _done(i: int, secs: List[Section]) -> None:
+        if timings is not None:
+            timings.setdefault("first_doc", time.perf_counter())
+        if on_doc is not None:
+            on_doc(i, secs)
+    return extract_many(pdf_paths, on_doc=_done)
+
+def run_pipeline(
+    pdf_paths: Sequence[pathlib.Path],
+    persona  : dict,
+    job      : str,
+    timings  : Optional[Dict[str, float]] = None,
+    on_doc   : Optional[Callable[[int, List[Section]], None]] = None,
+    on_ranked: Optional[Callable[[List[dict]], None]] = None,
+    budget   : Optional[Budget] = None,
+) -> Optional[dict]:
+    """
+    Full run over `pdf_paths` (doc1..docN in the given order); None when no
+    section could be extracted. `timings` receives first_doc (perf_counter
+    when the first document finished) and model_wait (seconds); `on_doc(i,
+    sections)` fires per PDF as it finishes, `on_ranked` and `budget` as in
+    rank_and_refine().
+    """
+    with _stage(budget, "extract"):
+        sections = _extract(pdf_paths, timings, on_doc)
+    if not sections:
+        return None
+    return rank_and_refine(sections, persona, job, timings, on_ranked, budget)
+
+def run_batch(
+    pdf_paths   : Sequence[pathlib.Path],
+    persona_jobs: Sequence[Tuple[dict, str]],
+    timings     : Optional[Dict[str, float]] = None,
+) -> Optional[List[dict]]:
+    """run_pipeline() for many persona/job pairs with one extraction pass."""
+    sections = _extract(pdf_paths, timings, None)
+    if not sections:
+        return None
+    return rank_and_refine_many(sections, persona_jobs, timings)
@@ -2,27 +2,23 @@
 Hybrid section-ranking:
     score = 0.5 · cosine(MiniLM)  +  0.5 · BM25
 +10 % bonus for H1/H2 headings.
-"""
-from __future__ import annotations
-from typing import List, Dict, Tuple
-import time, numpy as np
-from sentence_transformers import SentenceTransformer
-from rank_bm25 import BM25Okapi           # lightweight BM25
 
-# ──────────────────────────────────────────────────────────
-_MODEL_NAME = "sentence-transformers/all-MiniLM-L6-v2"
-_model: SentenceTransformer | None = None
+CASCADE_POOL=k turns it into a two-stage cascade: BM25 over every section
+picks the top-k pool, and only the pool is MiniLM-encoded and fused.
 
-def _get_model() -> SentenceTransformer:
-    global _model
-    if _model is None:
-        t0 = time.time()
-        _model = SentenceTransformer(_MODEL_NAME, device="cpu")
-        print(f"[ranker] MiniLM loaded in {time.time()-t0:.1f}s")
-    return _model
+    python -m app.ranker cascade <collection_dir> ... [--pool k]   # encode time saved + recall
+"""
+from __future__ import annotations
+import argparse, hashlib, json, os, pathlib, time
+from typing import Dict, Hashable, List, Sequence, Tuple
+import numpy as np
 
-# make accessible for paragraph_summarize.py
-get_model = _get_model
+from .ann         import IVFIndex
+from .bm25        import BM25Index
+from .config      import Config
+from .encoder     import get_encoder
+from .embed_store import EmbeddingStore, get_store, text_key
+from .trace       import span, traced
 
 # ──────────────────────────────────────────────────────────
 def build_query(persona: dict, job: str) -> str:
@@ -31,36 +27,248 @@ def build_query(persona: dict, job: str) -> str:
     focus  = ", ".join(persona.get("focus_areas", []))
     return f"Role: {role}. Expertise: {expert}. Focus: {focus}. Task: {job}"
 
+def section_payload(s: dict, chars: int = 400) -> str:
+    """Text embedded for a section's dense score."""
+    return f"{s['heading']}\n{s['full_text'][:chars]}"
+
+_n_encoded = 0                            # texts that reached the encoder (not served from a cache)
+
+def encoded_count() -> int:
+    return _n_encoded
+
+def _encode(texts: List[str]) -> np.ndarray:
+    global _n_encoded
+    _n_encoded += len(texts)
+    return get_encoder().encode(texts, batch_size=64)
+
 def _embed(texts: List[str]) -> np.ndarray:
-    mdl = _get_model()
-    return mdl.encode(texts, convert_to_numpy=True,
-                      normalize_embeddings=True, batch_size=64)
+    """L2-normalised vectors; served from the embedding cache when EMBED_CACHE_DIR is set."""
+    with span("embed", texts=len(texts)):
+        store = embedding_store()
+        if store is None:
+            return _encode(texts)
+        return store.encode(texts, _encode)
+
+def embedding_store() -> EmbeddingStore | None:
+    if not Config.EMBED_CACHE_DIR:
+        return None
+    enc = get_encoder()
+    return get_store(enc.name, enc.dim)
+
+# ANN retrieval (a prebuilt dense_index, or ANN_INDEX=1)
+_ANN_CANDIDATES = 200
+_ANN_NPROBE     = 8
+_ANN_MIN_ROWS   = 20_000                  # smaller corpora: exact products on the stored vectors
+_ANN_DELTA      = 0.25                    # delta rows (share of the index) that trigger a full save
+
+_library: IVFIndex | None = None          # ANN_INDEX=1: payload vectors of every section ranked so far
+
+def library_index(sections: Sequence[dict], chars: int = 400) -> Tuple[IVFIndex, List[str]] | None:
+    """
+    ANN_INDEX=1: the standing IVF index over section payloads, saved next to the
+    embedding cache (<EMBED_CACHE_DIR>/<model>.ivf.npz) and keyed by payload
+    hash. Payloads of `sections` it does not hold yet are added, their vectors
+    taken from the embedding store (encoded only if unseen) and appended as a
+    delta file; the index is rewritten in full (with new lists once it has
+    doubled since they were trained) only when the deltas pass 25 % of it.
+    Returns the index and one key per section; None without EMBED_CACHE_DIR.
+    """
+    global _library
+    store = embedding_store()
+    if store is None:
+        return None
+    payloads = [section_payload(s, chars) for s in sections]
+    keys     = [text_key(p) for p in payloads]
+    path     = store.mat_path.with_name(store.mat_path.stem + ".ivf.npz")
+    if _library is None and path.exists():
+        _library = IVFIndex.load(path)
+    known = _library.rows_of(keys) if _library is not None else np.full(len(keys), -1)
+    new   = {k: p for k, p, r in zip(keys, payloads, known.tolist()) if r < 0}
+    if new:
+        vecs = _embed(list(new.values()))
+        if _library is None:
+            _library = IVFIndex.build(vecs, list(new))
+            _library.save(path)
+            return _library, keys
+        _library.add(vecs, list(new))
+        _library.delta_rows += len(new)
+        if _library.outgrown():
+            _library = _library.retrained()
+        if _library.delta_rows == 0 or _library.delta_rows > _ANN_DELTA * len(_library):
+            _library.save(path)
+        else:
+            IVFIndex.save_delta(path, vecs, list(new), _library.dtype)
+    return _library, keys
+
+# BM25 index per corpus (kept for the last corpus; saved under BM25_INDEX_DIR)
+_BM25_KEEP = 32                           # saved corpus indexes kept (least recently used go)
+
+_corpus_bm25: Tuple[str, BM25Index] | None = None
+
+def corpus_bm25(sections: Sequence[dict]) -> BM25Index:
+    """
+    BM25 index over the sections' full texts, keyed by position. The index of
+    the last corpus is reused in-process; with BM25_INDEX_DIR it is also saved
+    as <dir>/<corpus hash>.bm25.npz and loaded by later runs over the same
+    sections instead of re-tokenising them.
+    """
+    global _corpus_bm25
+    h = hashlib.sha1(Config.BM25_TOKENIZER.encode())
+    for s in sections:
+        h.update(b"\0" + s["full_text"].encode("utf-8", "surrogatepass"))
+    digest = h.hexdigest()
+    if _corpus_bm25 is not None and _corpus_bm25[0] == digest:
+        return _corpus_bm25[1]
+    path = pathlib.Path(Config.BM25_INDEX_DIR) / f"{digest}.bm25.npz" if Config.BM25_INDEX_DIR else None
+    index = None
+    if path is not None and path.exists():
+        try:
+            index = BM25Index.load(path)
+            os.utime(path)                            # recency for eviction
+        except Exception:                             # truncated / foreign file: rebuild
+            index = None
+    if index is None:
+        index = BM25Index.from_texts(s["full_text"] for s in sections)
+        if path is not None:
+            index.save(path)
+            saved = sorted(path.parent.glob("*.bm25.npz"), key=lambda p: p.stat().st_mtime)
+            for old in saved[:-_BM25_KEEP]:
+                old.unlink(missing_ok=True)
+    _corpus_bm25 = (digest, index)
+    return index
 
 # ──────────────────────────────────────────────────────────
+@traced("rank")
 def rank_sections(
-    sections : List[dict],
+    sections : Sequence[dict],
     persona  : dict,
     job      : str,
-    keep_top : int = 15
-) -> Tuple[List[dict], List[dict]]:
+    keep_top : int = 15,
+    bm25_index: BM25Index | None = None,
+    dense_index: IVFIndex | None = None,
+    dense_vecs: np.ndarray | None = None,
+    bm25_keys : Sequence | None = None,
+    dense_keys: Sequence | None = None,
+    cascade_pool: int | None = None,
+    payload_chars: int = 400,
+) -> Tuple[List[dict], List[int]]:
+    """
+    (top result entries, their section IDs) – `sections` is a SectionStore (or
+    any sequence of section mappings; IDs are then positions).
+
+    `bm25_index` / `dense_index` – optional prebuilt indexes keyed by position in
+    `sections`, or by `bm25_keys` / `dense_keys` (one key per section;
+    dense_keys default to bm25_keys). With a dense_index (or ANN_INDEX=1, see
+    library_index()) the section payloads are not encoded; dense scores are
+    read from the index for this corpus' keys only – exact products on the
+    stored vectors below 20 000 sections, else an IVF search restricted to
+    them where only the top 200 candidates get dense credit (the rest, and
+    keys the index lacks, score 0 on the dense side). `dense_vecs` – precomputed
+    section_payload() vectors, one row per section. `cascade_pool` overrides
+    CASCADE_POOL (only used when section payloads would be encoded);
+    `payload_chars` – section text per payload (see section_payload()).
+    """
 
     query   = build_query(persona, job)
     q_vec   = _embed([query])[0]
 
+    # BM25 similarity (first: the cascade pool comes from it)
+    with span("bm25", sections=len(sections)):
+        if bm25_index is None:
+            bm25_index = corpus_bm25(sections)
+        keys     = range(len(sections)) if bm25_keys is None else bm25_keys
+        bm25_sim = bm25_index.get_scores(query, keys).astype(np.float32)
+
     # Dense similarity
-    payloads   = [f"{s['heading']}\n{s['full_text'][:400]}" for s in sections]
-    dense_vecs = _embed(payloads)
-    dense_sim  = dense_vecs @ q_vec       # cosine
-
-    # BM25 similarity
-    corpus_tok = [s["full_text"].lower().split() for s in sections]
-    bm25       = BM25Okapi(corpus_tok)
-    bm25_sim   = np.array(bm25.get_scores(query.lower().split()), dtype=np.float32)
+    pool = None
+    if dense_index is None and dense_vecs is None and Config.ANN_INDEX:
+        dense_index, dense_keys = library_index(sections, payload_chars) or (None, None)
+    if dense_index is None:
+        if dense_vecs is None:
+            pool = _cascade_pool([bm25_sim], keep_top, cascade_pool)
+            dense_sim = _pool_dense(sections, pool, q_vec, payload_chars)
+        else:
+            dense_sim = dense_vecs @ q_vec    # cosine
+    else:
+        if dense_keys is None:
+            dense_keys = range(len(sections)) if bm25_keys is None else bm25_keys
+        rows = dense_index.rows_of(dense_keys)               # this corpus only; -1 = not indexed
+        if len(sections) < _ANN_MIN_ROWS:                   # exact products on the stored vectors
+            sims      = dense_index.vecs[np.maximum(rows, 0)].astype(np.float32) @ q_vec
+            dense_sim = np.where(rows >= 0, sims, 0.0).astype(np.float32)
+        else:
+            where: Dict[Hashable, List[int]] = {}          # index key → section positions
+            for i, k in enumerate(dense_keys):
+                where.setdefault(k, []).append(i)
+            found, sims = dense_index.search(q_vec, k=_ANN_CANDIDATES, nprobe=_ANN_NPROBE, rows=rows)
+            dense_sim   = np.zeros(len(sections), dtype=np.float32)
+            for k, sim in zip(found, sims.tolist()):
+                dense_sim[where[k]] = sim
+
+    return _fuse_top(sections, dense_sim, bm25_sim, keep_top, pool)   # paragraph refinement happens elsewhere
+
+@traced("rank")
+def rank_sections_many(
+    sections    : Sequence[dict],
+    persona_jobs: Sequence[Tuple[dict, str]],
+    keep_top    : int = 15,
+    bm25_index  : BM25Index | None = None,
+) -> List[Tuple[List[dict], List[int]]]:
+    """
+    rank_sections() for many persona/job pairs over one corpus: sections and
+    all queries are encoded once, dense scores are one (sections × queries)
+    matrix product and the BM25 index is shared. Returns (top, IDs) per pair.
+    """
+    queries    = [build_query(p, j) for p, j in persona_jobs]
+    q_vecs     = _embed(queries)
+
+    with span("bm25", sections=len(sections), queries=len(queries)):
+        if bm25_index is None:
+            bm25_index = corpus_bm25(sections)
+        keys     = range(len(sections))
+        bm25_sim = [bm25_index.get_scores(q, keys).astype(np.float32) for q in queries]
+
+    pool      = _cascade_pool(bm25_sim, keep_top)          # union of every query's pool
+    dense_sim = _pool_dense(sections, pool, q_vecs.T)
+    return [_fuse_top(sections, dense_sim[:, k], bm25_sim[k], keep_top, pool) for k in range(len(queries))]
+
+def _cascade_pool(bm25_sims: Sequence[np.ndarray], keep_top: int, size: int | None = None) -> np.ndarray | None:
+    """
+    Sorted section positions in the BM25 top-`size` (CASCADE_POOL, at least
+    keep_top) of any query; None when the cascade is off or keeps everything.
+    """
+    size = Config.CASCADE_POOL if size is None else size
+    n    = len(bm25_sims[0])
+    if size <= 0 or max(size, keep_top) >= n:
+        return None
+    k    = max(size, keep_top)
+    pool = np.unique(np.concatenate([np.argsort(-s, kind="stable")[:k] for s in bm25_sims]))
+    return pool if len(pool) < n else None
+
+def _pool_dense(sections: Sequence[dict], pool: np.ndarray | None, q: np.ndarray,
+                chars: int = 400) -> np.ndarray:
+    """Cosine to query vector(s) `q`; with a pool only its payloads are encoded, the rest stay 0."""
+    if pool is None:
+        return _embed([section_payload(s, chars) for s in sections]) @ q
+    dense_sim = np.zeros((len(sections), *q.shape[1:]), dtype=np.float32)
+    dense_sim[pool] = _embed([section_payload(sections[i], chars) for i in pool.tolist()]) @ q
+    return dense_sim
+
+def _fuse_top(sections: Sequence[dict], dense_sim: np.ndarray, bm25_sim: np.ndarray,
+              keep_top: int, pool: np.ndarray | None = None) -> Tuple[List[dict], List[int]]:
+    """
+    0.5 · dense + 0.5 · max-normalised BM25, ×1.10 for H1/H2 → top `keep_top`
+    entries + IDs, drawn from `pool` (cascade candidates) when given.
+    """
     if bm25_sim.max() > 0:
         bm25_sim /= bm25_sim.max()
 
     # Late fusion
     final = 0.5 * dense_sim + 0.5 * bm25_sim
+    if pool is not None:
+        outside       = np.ones(len(final), dtype=bool)
+        outside[pool] = False
+        final[outside] = -np.inf
 
     # +10 % bonus for H1 / H2
     for i, s in enumerate(sections):
@@ -69,11 +277,77 @@ def rank_sections(
 
     order = np.argsort(-final)[: keep_top]
 
-    top_sections = [{
+    top = [{
         "document"       : sections[i]["doc_name"],
         "page_number"    : sections[i]["page_start"],
         "section_title"  : sections[i]["heading"],
         "importance_rank": r + 1
     } for r, i in enumerate(order)]
+    return top, order.tolist()
+
+# ──────────────────────────────────────────────────────────
+def check_cascade(collections: Sequence[pathlib.Path], pool: int, keep_top: int = 15) -> dict:
+    """
+    Full vs cascade ranking per persona JSON of each collection dir (PDFs +
+    persona JSONs, like input/): payload encode time of both (BM25 pool
+    selection counted against the cascade) and recall of the full fused
+    top `keep_top`.
+    """
+    from .parallel import extract_many
+    enc, rows = get_encoder(), []
+    for d in collections:
+        sections = extract_many(sorted(d.glob("*.pdf")))
+        if not len(sections):
+            continue
+        payloads = [section_payload(s) for s in sections]
+        bm25     = BM25Index.from_texts(s["full_text"] for s in sections)
+        enc.encode(payloads[:8], batch_size=64)               # warm-up outside the timings
+        t0 = time.perf_counter()
+        full_vecs = _encode(payloads)
+        t_full = time.perf_counter() - t0
+
+        for pj_path in sorted(d.glob("*.json")):
+            pj = json.loads(pj_path.read_text(encoding="utf-8"))
+            persona, job = pj["persona"], pj["job_to_be_done"]
+            _, full_ids = rank_sections(sections, persona, job, keep_top, bm25_index=bm25, dense_vecs=full_vecs)
+
+            t0   = time.perf_counter()
+            ids  = _cascade_pool([bm25.get_scores(build_query(persona, job), range(len(sections)))], keep_top, pool)
+            t_sel = time.perf_counter() - t0
+            ids  = np.arange(len(sections)) if ids is None else ids
+            t0   = time.perf_counter()
+            _encode([payloads[i] for i in ids.tolist()])
+            t_pool = time.perf_counter() - t0
+
+            _, casc_ids = rank_sections(sections, persona, job, keep_top, bm25_index=bm25, cascade_pool=pool)
+            rows.append({
+                "collection" : d.name,
+                "persona"    : pj_path.name,
+                "sections"   : len(sections),
+                "encoded"    : len(ids),
+                "full_encode_sec"   : round(t_full, 3),
+                "cascade_encode_sec": round(t_sel + t_pool, 3),
+                "encode_saved"      : round(1 - (t_sel + t_pool) / t_full, 3) if t_full else 0.0,
+                f"recall@{keep_top}": round(len(set(full_ids) & set(casc_ids)) / len(full_ids), 3),
+                "top1_same"  : casc_ids[:1] == full_ids[:1],
+            })
+    return {
+        "pool"      : pool,
+        "keep_top"  : keep_top,
+        "encode_saved_mean"        : round(float(np.mean([r["encode_saved"] for r in rows])), 3) if rows else None,
+        f"recall@{keep_top}_mean"  : round(float(np.mean([r[f"recall@{keep_top}"] for r in rows])), 3) if rows else None,
+        "runs"      : rows,
+    }
+
+def main(argv: Sequence[str] | None = None) -> None:
+    ap = argparse.ArgumentParser(prog="python -m app.ranker", description="Ranking checks")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    c = sub.add_parser("cascade", help="BM25-prefiltered cascade vs full ranking over collection dirs")
+    c.add_argument("collections", nargs="+", type=pathlib.Path)
+    c.add_argument("--pool", type=int, default=Config.CASCADE_POOL or 100)
+    c.add_argument("--keep-top", type=int, default=15)
+    args = ap.parse_args(argv)
+    print(json.dumps(check_cascade(args.collections, args.pool, args.keep_top), indent=2))
 
-    return top_sections, []   # paragraph refinement happens elsewhere
\ No newline at end of file
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+# app/section_cache.py
+"""
+Content-addressed on-disk cache for extract() results.
+
+key   = sha256(PDF bytes) : fingerprint of the extraction heuristics
+value = orjson section list without the per-run fields (doc_id / doc_name)
+
+Backed by one sqlite database in WAL mode, so several concurrent runs can
+read while one writes; writers serialise on BEGIN IMMEDIATE. The total
+payload is kept under Config.SECTION_CACHE_MB by least-recently-used eviction.
+"""
+from __future__ import annotations
+import hashlib, os, pathlib, sqlite3, threading, time
+from typing import List, Dict, Any
+
+import orjson
+
+from .config import Config
+
+# Bump on behavioural changes that the source fingerprint cannot see.
+HEURISTICS_VERSION = "1"
+_HEURISTIC_MODULES = (
+    "config", "text_utils", "layout", "pdf_loader", "features",
+    "level_assign", "sharding", "extract_outline_and_sections",
+)
+_PER_RUN_KEYS = ("doc_id", "doc_name")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sections (
+    key       TEXT PRIMARY KEY,
+    payload   BLOB    NOT NULL,
+    size      INTEGER NOT NULL,
+    last_used REAL    NOT NULL
+);
+CREATE INDEX IF NOT EXISTS sections_lru ON sections(last_used);
+"""
+
+# ──────────────────────────────────────────────────────────────
+_fingerprint: str | None = None
+
+def heuristics_fingerprint() -> str:
+    """Short hash over HEURISTICS_VERSION and the source of every extraction module."""
+    global _fingerprint
+    if _fingerprint is None:
+        h = hashlib.sha256(HEURISTICS_VERSION.encode())
+        pkg = pathlib.Path(__file__).parent
+        for name in _HEURISTIC_MODULES:
+            h.update((pkg / f"{name}.py").read_bytes())
+        _fingerprint = h.hexdigest()[:16]
+    return _fingerprint
+
+def file_sha256(path: pathlib.Path, chunk: int = 1 << 20) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as fh:
+        while block := fh.read(chunk):
+            h.update(block)
+    return h.hexdigest()
+
+# ──────────────────────────────────────────────────────────────
+class SectionCache:
+    def __init__(self, root: str | pathlib.Path, max_bytes: int):
+        self.path = pathlib.Path(root) / "sections.sqlite"
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self._local = threading.local()
+
+    def _db(self) -> sqlite3.Connection:
+        # sqlite connections must not cross fork() or threads → one per process + thread
+        local = self._local
+        if getattr(local, "conn", None) is None or local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=30.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(_SCHEMA)
+            local.conn, local.pid = conn, os.getpid()
+        return local.conn
+
+    def key_for(self, pdf_path: pathlib.Path) -> str:
+        return f"{file_sha256(pdf_path)}:{heuristics_fingerprint()}"
+
+    def get(self, key: str) -> List[Dict[str, Any]] | None:
+        db  = self._db()
+        row = db.execute("SELECT payload FROM sections WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        try:
+            db.execute("UPDATE sections SET last_used = ? WHERE key = ?", (time.time(), key))
+        except sqlite3.OperationalError:
+            pass                          # LRU touch is best-effort under heavy contention
+        return orjson.loads(row[0])
+
+    def put(self, key: str, sections: List[Dict[str, Any]]) -> None:
+        payload = orjson.dumps(
+            [{k: v for k, v in s.items() if k not in _PER_RUN_KEYS} for s in sections]
+        )
+        db = self._db()
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            db.execute(
+                "INSERT OR REPLACE INTO sections(key, payload, size, last_used) VALUES (?, ?, ?, ?)",
+                (key, payload, len(payload), time.time()),
+            )
+            self._evict(db)
+            db.execute("COMMIT")
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+
+    def _evict(self, db: sqlite3.Connection) -> None:
+        total = db.execute("SELECT COALESCE(SUM(size), 0) FROM sections").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        victims = []
+        for key, size in db.execute("SELECT key, size FROM sections ORDER BY last_used"):
+            if total <= self.max_bytes:
+                break
+            victims.append((key,))
+            total -= size
+        db.executemany("DELETE FROM sections WHERE key = ?", victims)
+
+# ──────────────────────────────────────────────────────────────
+_cache: SectionCache | None = None
+
+def get_cache() -> SectionCache | None:
+    """Process-wide cache, or None when SECTION_CACHE_DIR is unset."""
+    global _cache
+    if _cache is None and Config.SECTION_CACHE_DIR:
+        _cache = SectionCache(Config.SECTION_CACHE_DIR, Config.SECTION_CACHE_MB << 20)
+    return _cache
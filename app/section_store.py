@@ -0,0 +1,184 @@
+# app/section_store.py
+"""
+Columnar section storage with stable IDs.
+
+A section's ID is its row number (rows are only ever appended). Metadata lives
+in one column per field; paragraph text is stored once, UTF-8, in a single
+buffer addressed by per-paragraph (offset, length). `paragraphs` and
+`full_text` are materialised only when a row is read, so ranking by ID is
+O(1) per section and nothing keeps a second copy of the text.
+
+    store = SectionStore()
+    ids   = store.add_document("doc1", "a.pdf", sections)   # extractor dicts
+    sec   = store[ids[0]]            # SectionView: sec["heading"], sec["full_text"], …
+    store.save(path); SectionStore.load(path)               # text buffer memory-mapped
+"""
+from __future__ import annotations
+import json, mmap, os, pathlib
+from collections.abc import Mapping
+from typing import Any, Dict, Iterable, Iterator, List, Tuple
+
+import numpy as np
+
+def full_text(paragraphs: Iterable[Dict[str, Any]]) -> str:
+    """A section's full text: its paragraphs joined by blank lines."""
+    return "\n\n".join(p["text"] for p in paragraphs)
+
+# ──────────────────────────────────────────────────────────────
+class SectionView(Mapping):
+    """Read-only row of a SectionStore with the extractor's section-dict keys."""
+    __slots__ = ("store", "id")
+    KEYS = ("doc_id", "doc_name", "heading", "level", "page_start", "page_end", "full_text", "paragraphs")
+
+    def __init__(self, store: "SectionStore", sid: int):
+        self.store, self.id = store, sid
+
+    def __getitem__(self, key: str):
+        try:
+            return SectionStore._FIELDS[key](self.store, self.id)
+        except KeyError:
+            raise KeyError(key) from None
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.KEYS)
+
+    def __len__(self) -> int:
+        return len(self.KEYS)
+
+    def __repr__(self) -> str:
+        return f"<section {self.id} {self['doc_name']}: {self['heading']!r}>"
+
+class SectionStore:
+    def __init__(self):
+        self.doc_ids:   List[str] = []       # per document
+        self.doc_names: List[str] = []
+        self.doc:        List[int] = []      # per section
+        self.heading:    List[str] = []
+        self.level:      List[str] = []      # "H1" …
+        self.page_start: List[int] = []
+        self.page_end:   List[int] = []
+        self.para_lo:    List[int] = []      # paragraph rows [para_lo, para_hi)
+        self.para_hi:    List[int] = []
+        self.para_page:  List[int] = []      # per paragraph
+        self.para_off:   List[int] = []
+        self.para_len:   List[int] = []
+        self._buf: bytearray | mmap.mmap | bytes = bytearray()
+
+    # ── building ─────────────────────────────────────────────
+    def add_document(self, doc_id: str, doc_name: str, sections: Iterable[Dict[str, Any]]) -> range:
+        """Append one document's sections (extractor dicts); returns their IDs."""
+        if not isinstance(self._buf, bytearray):
+            raise TypeError("a loaded SectionStore is read-only")
+        d     = len(self.doc_ids)
+        first = len(self.heading)
+        self.doc_ids.append(doc_id)
+        self.doc_names.append(doc_name)
+        for s in sections:
+            self.doc.append(d)
+            self.heading.append(s["heading"])
+            self.level.append(s["level"])
+            self.page_start.append(s["page_start"])
+            self.page_end.append(s["page_end"])
+            self.para_lo.append(len(self.para_page))
+            for p in s["paragraphs"]:
+                raw = p["text"].encode("utf-8")
+                self.para_page.append(p["page"])
+                self.para_off.append(len(self._buf))
+                self.para_len.append(len(raw))
+                self._buf += raw
+            self.para_hi.append(len(self.para_page))
+        return range(first, len(self.heading))
+
+    @classmethod
+    def from_documents(cls, docs: Iterable[tuple]) -> "SectionStore":
+        """(doc_id, doc_name, sections) triples, in order."""
+        store = cls()
+        for doc_id, doc_name, sections in docs:
+            store.add_document(doc_id, doc_name, sections)
+        return store
+
+    # ── reading ──────────────────────────────────────────────
+    def __len__(self) -> int:
+        return len(self.heading)
+
+    def __getitem__(self, sid: int) -> SectionView:
+        if not 0 <= sid < len(self.heading):
+            raise IndexError(sid)
+        return SectionView(self, sid)
+
+    def __iter__(self) -> Iterator[SectionView]:
+        return (SectionView(self, i) for i in range(len(self.heading)))
+
+    def _text(self, pid: int) -> str:
+        off = self.para_off[pid]
+        return self._buf[off:off + self.para_len[pid]].decode("utf-8")
+
+    def paragraphs(self, sid: int) -> List[Dict[str, Any]]:
+        return [{"page": self.para_page[j], "text": self._text(j)}
+                for j in range(self.para_lo[sid], self.para_hi[sid])]
+
+    def full_text(self, sid: int) -> str:
+        return "\n\n".join(self._text(j) for j in range(self.para_lo[sid], self.para_hi[sid]))
+
+    def documents(self) -> Iterator[Tuple[str, str, List[Dict[str, Any]]]]:
+        """(doc_id, doc_name, extractor dicts) per document – the inverse of from_documents()."""
+        rows: List[List[int]] = [[] for _ in self.doc_ids]
+        for sid, d in enumerate(self.doc):
+            rows[d].append(sid)
+        for d, sids in enumerate(rows):
+            yield self.doc_ids[d], self.doc_names[d], [{
+                "doc_id"    : self.doc_ids[d],
+                "doc_name"  : self.doc_names[d],
+                "heading"   : self.heading[i],
+                "level"     : self.level[i],
+                "page_start": self.page_start[i],
+                "page_end"  : self.page_end[i],
+                "paragraphs": self.paragraphs(i),
+            } for i in sids]
+
+    _FIELDS = {
+        "doc_id"    : lambda st, i: st.doc_ids[st.doc[i]],
+        "doc_name"  : lambda st, i: st.doc_names[st.doc[i]],
+        "heading"   : lambda st, i: st.heading[i],
+        "level"     : lambda st, i: st.level[i],
+        "page_start": lambda st, i: st.page_start[i],
+        "page_end"  : lambda st, i: st.page_end[i],
+        "full_text" : lambda st, i: st.full_text(i),
+        "paragraphs": lambda st, i: st.paragraphs(i),
+    }
+
+    # ── persistence ──────────────────────────────────────────
+    _STR_COLS = ("doc_ids", "doc_names", "heading", "level")
+    _INT_COLS = ("doc", "page_start", "page_end", "para_lo", "para_hi",
+                 "para_page", "para_off", "para_len")
+
+    def save(self, path: str | pathlib.Path) -> None:
+        """<path> (.npz columns) + <path>.text (raw UTF-8 buffer); both replaced atomically."""
+        path = pathlib.Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        suffix = f".{os.getpid()}.tmp"
+        text   = path.with_name(path.name + ".text")
+        with open(text.with_name(text.name + suffix), "wb") as fh:
+            fh.write(self._buf)
+        with open(path.with_name(path.name + suffix), "wb") as fh:
+            np.savez(fh, meta=np.array(json.dumps({c: getattr(self, c) for c in self._STR_COLS},
+                                                  ensure_ascii=False)),
+                     **{c: np.asarray(getattr(self, c), dtype=np.int64) for c in self._INT_COLS})
+        os.replace(text.with_name(text.name + suffix), text)
+        os.replace(path.with_name(path.name + suffix), path)
+
+    @classmethod
+    def load(cls, path: str | pathlib.Path) -> "SectionStore":
+        """Read-only store; the text buffer is memory-mapped, not read."""
+        path  = pathlib.Path(path)
+        store = cls()
+        with np.load(path, allow_pickle=False) as z:
+            meta = json.loads(str(z["meta"]))
+            for c in cls._INT_COLS:
+                setattr(store, c, z[c].tolist())
+        for c in cls._STR_COLS:
+            setattr(store, c, meta[c])
+        with open(path.with_name(path.name + ".text"), "rb") as fh:
+            size = os.fstat(fh.fileno()).st_size
+            store._buf = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) if size else b""
+        return store
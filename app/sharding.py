@@ -0,0 +1,95 @@
+# app/sharding.py
+"""
+Intra-document parallelism: page-range shards of one PDF.
+
+Pass 1 – every shard reopens the file, parses its pages and returns its
+         lines plus partial DocStats (body sizes, running-header map, TOC pages).
+Pass 2 – the merged, document-global DocStats go back to the shards, which
+         compute features and return only their heading candidates.
+
+Shards never split a page, so every per-page heuristic stays shard-local and
+the result is identical to compute_features() over the whole document.
+"""
+import sys, pathlib
+import multiprocessing as mp
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Dict, Any, Tuple
+
+from .           import trace
+from .config     import Config
+from .layout     import Line
+from .pdf_loader import iter_pages, load_lines, count_pages
+from .features   import DocStats, doc_stats, merge_stats, compute_features
+
+# ──────────────────────────────────────────────────────────────
+def page_ranges(page_count: int, pages_per_shard: int) -> List[Tuple[int, int]]:
+    step = max(1, pages_per_shard)
+    return [(a, min(a + step, page_count)) for a in range(0, page_count, step)]
+
+def _parse_shard(pdf_path: str, start: int, stop: int) -> Tuple[List[Line], DocStats]:
+    lines = [ln for page_ctx in iter_pages(pdf_path, start, stop) for ln in page_ctx.lines]
+    return lines, doc_stats(lines)
+
+def _shard_candidates(lines: List[Line], page_count: int, stats: DocStats) -> List[Dict[str, Any]]:
+    return compute_features(lines, page_count, stats).candidates()
+
+# ──────────────────────────────────────────────────────────────
+def sharded_candidates(
+    pdf_path: str,
+    page_count: int,
+    workers: int | None = None,
+    pages_per_shard: int | None = None,
+) -> Tuple[List[Line], List[Dict[str, Any]]]:
+    """Return (lines, candidate features) for the whole document, in reading order."""
+    ranges = page_ranges(page_count, pages_per_shard or Config.SHARD_PAGES)
+    n  = len(ranges)
+    st = [trace.state()] * n             # shard spans come back with each result
+    with ProcessPoolExecutor(max_workers=workers or Config.SHARD_WORKERS,
+                             mp_context=mp.get_context("forkserver")) as ex:
+        parsed = [trace.absorb(*r) for r in ex.map(
+            trace.call_collect, st, [_parse_shard] * n, *zip(*((pdf_path, a, b) for a, b in ranges)))]
+        stats  = merge_stats(s for _, s in parsed)
+        cands  = [trace.absorb(*r) for r in ex.map(
+            trace.call_collect, st, [_shard_candidates] * n,
+            [lns for lns, _ in parsed],
+            [page_count] * n,
+            [stats] * n,
+        )]
+
+    lines = [ln for lns, _ in parsed for ln in lns]
+    return lines, [f for shard in cands for f in shard]
+
+def lines_and_candidates(pdf_path: str) -> Tuple[List[Line], List[Dict[str, Any]], int]:
+    """Single-process or sharded, depending on Config.SHARD_WORKERS / SHARD_PAGES."""
+    if Config.SHARD_WORKERS > 1:
+        page_count = count_pages(pdf_path)
+        if page_count > Config.SHARD_PAGES:
+            lines, cands = sharded_candidates(pdf_path, page_count)
+            return lines, cands, page_count
+
+    lines, page_count = load_lines(pdf_path)
+    cands = compute_features(lines, page_count).candidates()
+    return lines, cands, page_count
+
+# ──────────────────────────────────────────────────────────────
+def main():
+    """python -m app.sharding <pdf> [workers] [pages_per_shard] – check sharded == single-process."""
+    if len(sys.argv) < 2:
+        print("Usage: python -m app.sharding <pdf> [workers] [pages_per_shard]")
+        sys.exit(2)
+    pdf_path = sys.argv[1]
+    workers  = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+    per      = int(sys.argv[3]) if len(sys.argv) > 3 else 25
+
+    ref_lines, page_count = load_lines(pdf_path)
+    ref_cands = compute_features(ref_lines, page_count).candidates()
+    lines, cands = sharded_candidates(pdf_path, page_count, workers, per)
+
+    same_lines = [(l.page, l.text, l.y0) for l in lines] == [(l.page, l.text, l.y0) for l in ref_lines]
+    same_cands = cands == ref_cands
+    print(f"pages={page_count} shards={len(page_ranges(page_count, per))} "
+          f"lines_match={same_lines} candidates_match={same_cands} ({len(cands)} candidates)")
+    sys.exit(0 if same_lines and same_cands else 1)
+
+if __name__ == "__main__":
+    main()
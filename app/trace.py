@@ -0,0 +1,184 @@
+# app/trace.py
+"""
+Stage spans for profiling, switched on with TRACE=1 (off: span() hands back a
+shared no-op and traced() functions run unwrapped).
+
+    with span("embed", texts=len(texts)): ...
+    @traced("assign_levels")
+    def assign_levels(...): ...
+
+Spans nest per thread and inherit the `doc` argument of the span around them,
+so every event can be attributed to a PDF. TRACE_MALLOC=1 adds the tracemalloc
+peak (KiB above the span's starting point) to every span – slow, as every
+allocation is traced.
+
+    export_chrome(path)   Chrome trace-event JSON (chrome://tracing, ui.perfetto.dev)
+    summary()             per stage: count, total / max ms, peak KiB
+    doc_stats()           per document: pages and ms per stage
+
+Process-pool workers run through call_collect(), which returns their events
+with the result; absorb() merges them in the parent.
+"""
+from __future__ import annotations
+import functools, json, os, pathlib, threading, time, tracemalloc
+from collections import defaultdict
+from contextlib import nullcontext
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .config import Config
+
+_enabled = False
+_malloc  = False
+_events: List[dict] = []
+_local   = threading.local()
+_NOOP    = nullcontext()
+
+def configure(enabled: bool, malloc: bool = False) -> None:
+    global _enabled, _malloc
+    _enabled, _malloc = enabled, enabled and malloc
+    if _malloc and not tracemalloc.is_tracing():
+        tracemalloc.start()
+
+def enabled() -> bool:
+    return _enabled
+
+def state() -> Tuple[bool, bool, Optional[str]]:
+    """What a worker needs to trace like this thread: (enabled, malloc, current doc)."""
+    return _enabled, _malloc, _current_doc()
+
+def reset() -> None:
+    _events.clear()
+
+def drain() -> List[dict]:
+    out = _events[:]
+    _events.clear()
+    return out
+
+# ──────────────────────────────────────────────────────────────
+def _stack() -> list:
+    st = getattr(_local, "stack", None)
+    if st is None:
+        st = _local.stack = []
+    return st
+
+def _current_doc() -> Optional[str]:
+    st = _stack()
+    return st[-1].args.get("doc") if st else getattr(_local, "doc", None)
+
+class _Span:
+    __slots__ = ("name", "args", "t0", "mem0", "peak")
+
+    def __init__(self, name: str, args: Dict[str, Any]):
+        self.name, self.args = name, args
+
+    def __enter__(self):
+        st = _stack()
+        if "doc" not in self.args:
+            doc = _current_doc()
+            if doc is not None:
+                self.args["doc"] = doc
+        if _malloc:
+            cur, peak = tracemalloc.get_traced_memory()
+            if st:                        # keep the parent's peak before resetting it
+                st[-1].peak = max(st[-1].peak, peak)
+            tracemalloc.reset_peak()
+            self.mem0 = self.peak = cur
+        st.append(self)
+        self.t0 = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc):
+        t1 = time.perf_counter_ns()
+        st = _stack()
+        st.pop()
+        if _malloc:
+            self.peak = max(self.peak, tracemalloc.get_traced_memory()[1])
+            self.args["peak_kib"] = round((self.peak - self.mem0) / 1024, 1)
+            if st:
+                st[-1].peak = max(st[-1].peak, self.peak)
+        _events.append({
+            "name": self.name, "ph": "X", "ts": self.t0 // 1000, "dur": (t1 - self.t0) / 1000,
+            "pid": os.getpid(), "tid": threading.get_native_id(), "args": self.args,
+        })
+        return False
+
+def span(name: str, **args):
+    return _Span(name, args) if _enabled else _NOOP
+
+def traced(name: str) -> Callable:
+    """Decorator: the whole call is one span (checked per call, so configure() applies at once)."""
+    def deco(fn: Callable) -> Callable:
+        @functools.wraps(fn)
+        def wrapper(*a, **kw):
+            if not _enabled:
+                return fn(*a, **kw)
+            with _Span(name, {}):
+                return fn(*a, **kw)
+        return wrapper
+    return deco
+
+# ── process pools ────────────────────────────────────────────
+def call_collect(st: Tuple[bool, bool, Optional[str]], fn: Callable, *args):
+    """Worker side: fn(*args) traced per the parent's state(); returns (result, events)."""
+    configure(st[0], st[1])
+    _local.doc = st[2]
+    try:
+        return fn(*args), drain()
+    finally:
+        _local.doc = None
+
+def absorb(result, events: List[dict]):
+    """Parent side of call_collect(): keep the worker's events, return its result."""
+    _events.extend(events)
+    return result
+
+# ── reports ──────────────────────────────────────────────────
+def summary(events: Optional[List[dict]] = None) -> Dict[str, dict]:
+    """Per span name: count, total / mean / max ms and the largest tracemalloc peak."""
+    agg: Dict[str, dict] = {}
+    for ev in _events if events is None else events:
+        a = agg.setdefault(ev["name"], {"count": 0, "total_ms": 0.0, "max_ms": 0.0})
+        ms = ev["dur"] / 1000
+        a["count"]    += 1
+        a["total_ms"] += ms
+        a["max_ms"]    = max(a["max_ms"], ms)
+        if "peak_kib" in ev["args"]:
+            a["peak_kib"] = max(a.get("peak_kib", 0.0), ev["args"]["peak_kib"])
+    for a in agg.values():
+        a["mean_ms"]  = round(a["total_ms"] / a["count"], 3)
+        a["total_ms"] = round(a["total_ms"], 3)
+        a["max_ms"]   = round(a["max_ms"], 3)
+    return dict(sorted(agg.items(), key=lambda kv: -kv[1]["total_ms"]))
+
+def doc_stats(events: Optional[List[dict]] = None) -> Dict[str, dict]:
+    """Per document: pages parsed and ms per stage (stages nest, so they overlap `extract`)."""
+    per: Dict[str, dict] = defaultdict(lambda: {"pages": 0, "stages_ms": defaultdict(float)})
+    for ev in _events if events is None else events:
+        doc = ev["args"].get("doc")
+        if doc is None:
+            continue
+        per[doc]["stages_ms"][ev["name"]] += ev["dur"] / 1000
+        if ev["name"] == "load":
+            per[doc]["pages"] += 1
+    return {
+        doc: {"pages": d["pages"], "stages_ms": {k: round(v, 3) for k, v in d["stages_ms"].items()}}
+        for doc, d in sorted(per.items())
+    }
+
+def export_chrome(path: str | pathlib.Path, events: Optional[List[dict]] = None) -> pathlib.Path:
+    path = pathlib.Path(path)
+    evs  = _events if events is None else events
+    t0   = min((ev["ts"] for ev in evs), default=0)          # start the timeline at 0
+    with open(path, "w", encoding="utf-8") as fh:
+        json.dump({"traceEvents": [{**ev, "ts": ev["ts"] - t0} for ev in evs],
+                   "displayTimeUnit": "ms"}, fh, ensure_ascii=False)
+    return path
+
+def format_summary(stats: Dict[str, dict]) -> str:
+    rows = [f"{'stage':<18}{'count':>7}{'total ms':>12}{'max ms':>10}{'peak KiB':>11}"]
+    for name, a in stats.items():
+        peak = f"{a['peak_kib']:.0f}" if "peak_kib" in a else "–"
+        rows.append(f"{name:<18}{a['count']:>7}{a['total_ms']:>12.1f}{a['max_ms']:>10.1f}{peak:>11}")
+    return "\n".join(rows)
+
+configure(Config.TRACE or Config.TRACE_METADATA, Config.TRACE_MALLOC)
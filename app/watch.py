@@ -0,0 +1,207 @@
+# app/watch.py
+"""
+Watch-directory mode: per-document state (sections, section vectors, BM25
+postings) keyed by file hash. Each poll extracts and embeds only the added or
+changed PDFs, drops removed ones, then re-ranks the corpus from that state –
+global BM25 statistics refreshed, unchanged documents never re-parsed or
+re-encoded – and atomically rewrites result.json (result.ndjson).
+
+    WATCH=1 python main.py                                   # /app/input → /app/output
+    python -m app.watch <input_dir> <output_dir> [--interval 2] [--once]
+
+A PDF is picked up once its size / mtime held still for one poll, so half-
+copied files are not parsed; a touch without a content change only updates
+the stat. Editing the persona JSON re-ranks without re-extracting.
+"""
+from __future__ import annotations
+import argparse, json, os, pathlib, sys, time
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .config        import Config
+from .bm25          import BM25Index
+from .parallel      import extract_many
+from .section_cache import file_sha256
+from .section_store import SectionStore
+from .extract_outline_and_sections import Section
+
+Stat = Tuple[int, int]                   # (size, mtime_ns)
+
+def _stat(path: pathlib.Path) -> Stat:
+    st = path.stat()
+    return st.st_size, st.st_mtime_ns
+
+# ──────────────────────────────────────────────────────────────
+@dataclass
+class DocState:
+    sha256  : str
+    stat    : Stat
+    sections: List[Section]              # extractor dicts; a SectionStore is built per ranking
+    vecs    : np.ndarray                 # section_payload() vectors, one row per section
+
+class Corpus:
+    """Per-document sections / vectors plus one incremental BM25 index keyed (doc name, i)."""
+
+    def __init__(self):
+        self.docs: Dict[str, DocState] = {}
+        self.bm25 = BM25Index()
+
+    def _drop(self, name: str) -> None:
+        old = self.docs.pop(name, None)
+        if old is not None:
+            for i in range(len(old.sections)):
+                self.bm25.remove((name, i))
+
+    def update(self, changed: Dict[str, Tuple[pathlib.Path, str, Stat]], removed: List[str]) -> List[str]:
+        """Re-extract `changed` (name → path, sha256, stat), forget `removed`; returns names that failed."""
+        from .ranker import _embed, section_payload
+
+        for name in removed:
+            self._drop(name)
+        names = sorted(changed)
+        try:
+            per_doc = {name: secs for _, name, secs in extract_many([changed[n][0] for n in names]).documents()}
+            failed  = []
+        except Exception:                # e.g. one truncated upload: retry the rest one by one
+            per_doc, failed = {}, []
+            for name in names:
+                try:
+                    per_doc[name] = next(extract_many([changed[name][0]]).documents())[2]
+                except Exception as exc:
+                    print(f"[watch] ✗ {name}: {exc!r} – retried when the file changes", file=sys.stderr)
+                    failed.append(name)
+
+        for name, sections in per_doc.items():
+            self._drop(name)
+            _, sha, st = changed[name]
+            store = SectionStore.from_documents([(name, name, sections)])
+            vecs  = _embed([section_payload(s) for s in store]) if sections else np.zeros((0, 0), np.float32)
+            self.docs[name] = DocState(sha, st, sections, vecs)
+            self.bm25.add_many(((name, i), s["full_text"]) for i, s in enumerate(store))
+        return failed
+
+    def rank(self, persona: dict, job: str) -> Optional[dict]:
+        """result.json for the current corpus, in main.py's document order."""
+        from .ranker              import build_query, rank_sections
+        from .paragraph_summarize import refine_sections
+        from .pipeline            import _result_json
+
+        names    = sorted(self.docs)
+        sections = SectionStore.from_documents((f"doc{pos}", name, self.docs[name].sections)
+                                               for pos, name in enumerate(names, 1))
+        if not len(sections):
+            return None
+        keys = [(name, i) for name in names for i in range(len(self.docs[name].sections))]
+        vecs = np.concatenate([self.docs[n].vecs for n in names if self.docs[n].sections])
+
+        top, ids = rank_sections(sections, persona, job, keep_top=15, bm25_index=self.bm25,
+                                 dense_vecs=vecs, bm25_keys=keys)
+        sub = [r for r in refine_sections([sections[i] for i in ids], build_query(persona, job)) if r]
+        return _result_json(sections, persona, job, top, sub)
+
+# ──────────────────────────────────────────────────────────────
+class Watcher:
+    def __init__(self, input_dir: pathlib.Path, output_dir: pathlib.Path, settle: bool = True):
+        self.input_dir  = pathlib.Path(input_dir)
+        self.output_dir = pathlib.Path(output_dir)
+        self.settle     = settle         # require one unchanged poll before reading a file
+        self.corpus     = Corpus()
+        self._last_poll: Dict[str, Stat] = {}
+        self._failed:    Dict[str, Stat] = {}
+        self._persona: Optional[Tuple[pathlib.Path, Stat, dict, str]] = None
+
+    def _load_persona(self) -> bool:
+        """(Re)load the first persona JSON; True when it changed."""
+        files = sorted(self.input_dir.glob("*.json"))
+        if not files:
+            return False
+        path, st = files[0], _stat(files[0])
+        if self._persona is not None and self._persona[:2] == (path, st):
+            return False
+        data = json.loads(path.read_text(encoding="utf-8"))
+        self._persona = (path, st, data["persona"], data["job_to_be_done"])
+        return True
+
+    def poll(self) -> bool:
+        """One scan; True when the result was rewritten."""
+        t0      = time.perf_counter()
+        current = {p.name: _stat(p) for p in self.input_dir.glob("*.pdf")}
+        ready   = {n: st for n, st in current.items() if not self.settle or self._last_poll.get(n) == st}
+        self._last_poll = current
+
+        docs    = self.corpus.docs
+        removed = [n for n in docs if n not in current]
+        changed: Dict[str, Tuple[pathlib.Path, str, Stat]] = {}
+        for name, st in ready.items():
+            if (name in docs and docs[name].stat == st) or self._failed.get(name) == st:
+                continue
+            path = self.input_dir / name
+            sha  = file_sha256(path)
+            if name in docs and docs[name].sha256 == sha:
+                docs[name].stat = st     # touched, same bytes
+                continue
+            changed[name] = (path, sha, st)
+
+        persona_changed = self._load_persona()
+        if not (changed or removed or persona_changed) or self._persona is None:
+            return False
+
+        is_new = {n: n not in docs for n in changed}
+        failed = self.corpus.update(changed, removed) if (changed or removed) else []
+        done   = [n for n in changed if n not in failed]
+        added  = sum(is_new[n] for n in done)
+        self._failed = {n: st for n, st in self._failed.items() if n in current and n not in changed}
+        self._failed.update((n, changed[n][2]) for n in failed)
+        if not (done or removed or persona_changed):
+            return False
+        t_docs = time.perf_counter() - t0
+
+        out_json = self.corpus.rank(*self._persona[2:])
+        if out_json is None:
+            print("[watch] no sections extracted yet", file=sys.stderr)
+            return False
+        path = self._write(out_json)
+        print(f"[watch] +{added} ~{len(done) - added} -{len(removed)} docs "
+              f"({t_docs:.2f}s), {sum(len(d.sections) for d in docs.values())} sections in "
+              f"{len(docs)} docs ranked in {time.perf_counter() - t0 - t_docs:.2f}s → {path}",
+              file=sys.stderr)
+        return True
+
+    def _write(self, out_json: dict) -> pathlib.Path:
+        from .output import NDJSONWriter, write_json
+        path = self.output_dir / f"result.{Config.OUTPUT_FORMAT}"
+        tmp  = path.with_name(path.name + ".tmp")            # readers never see a partial file
+        if Config.OUTPUT_FORMAT == "ndjson":
+            NDJSONWriter(tmp, []).write_result(out_json)
+        else:
+            write_json(tmp, out_json)
+        os.replace(tmp, path)
+        return path
+
+    def run(self, interval: float = 2.0, once: bool = False) -> None:
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        if once:
+            self.settle = False
+            self.poll()
+            return
+        print(f"[watch] polling {self.input_dir} every {interval:g}s", file=sys.stderr)
+        try:
+            while True:
+                self.poll()
+                time.sleep(interval)
+        except KeyboardInterrupt:
+            pass
+
+def main(argv: Optional[List[str]] = None) -> None:
+    ap = argparse.ArgumentParser(prog="python -m app.watch", description="Incremental Round-1B over a watched directory")
+    ap.add_argument("input_dir")
+    ap.add_argument("output_dir")
+    ap.add_argument("--interval", type=float, default=Config.WATCH_INTERVAL)
+    ap.add_argument("--once", action="store_true", help="process the directory once and exit")
+    args = ap.parse_args(argv)
+    Watcher(pathlib.Path(args.input_dir), pathlib.Path(args.output_dir)).run(args.interval, args.once)
+
+if __name__ == "__main__":
+    main()
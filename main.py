@@ -1,10 +1,16 @@
 # main.py  – Round-1B top-level runner
 #!/usr/bin/env python3
-import json, time, pathlib, sys
-
-from app.extract_outline_and_sections import extract
-from app.ranker              import rank_sections, build_query
-from app.paragraph_summarize import refine_section   # <- NEW
+import time
+_T_START = time.perf_counter()
+import json, pathlib, sys
+
+from app                     import trace
+from app.config              import Config
+from app.pipeline            import run_pipeline, run_batch
+from app.output              import FORMATS, NDJSONWriter, write_json
+# app.ranker / app.paragraph_summarize (numpy, BM25, TextRank) and the encoder
+# (torch / onnxruntime) are imported by the pipeline, while PDFs are parsed.
+_IMPORT_SEC = time.perf_counter() - _T_START
 
 INPUT_DIR  = pathlib.Path("/app/input")
 OUTPUT_DIR = pathlib.Path("/app/output")
@@ -31,53 +37,129 @@ def main() -> None:
     if not persona_files:
         print("✗ No persona JSON found in /app/input. Exiting.", file=sys.stderr)
         sys.exit(1)
+    if Config.OUTPUT_FORMAT not in FORMATS:
+        print(f"✗ OUTPUT_FORMAT must be one of {FORMATS}", file=sys.stderr)
+        sys.exit(2)
 
-    persona, job = load_persona_job(persona_files[0])
-    query        = build_query(persona, job)
+    # load MiniLM in the background while the PDFs are parsed
+    if Config.PRELOAD_MODEL:
+        from app.encoder import preload
+        preload()
 
-    # 2) section extraction for every PDF
-    sections = []
-    for idx, pdf_path in enumerate(sorted(INPUT_DIR.glob("*.pdf")), start=1):
-        sections.extend(extract(pdf_path, f"doc{idx}"))
+    if Config.BATCH_PERSONAS:
+        return main_batch(sorted(persona_files))
+    if Config.WATCH:
+        from app.watch import Watcher
+        return Watcher(INPUT_DIR, OUTPUT_DIR).run(Config.WATCH_INTERVAL)
 
-    if not sections:
+    persona, job = load_persona_job(persona_files[0])
+
+    # 2) extraction (WORKERS=<n> → process pool), ranking, paragraph refinement
+    pdf_paths = sorted(INPUT_DIR.glob("*.pdf"))
+    timings: dict = {}
+    stream = None
+    if Config.OUTPUT_FORMAT == "ndjson":           # records go out as soon as they exist
+        stream = NDJSONWriter(OUTPUT_DIR / "result.ndjson", pdf_paths)
+        stream.metadata(persona, job)
+    budget = None
+    if Config.DEADLINE_SEC > 0:                   # degrade to finish within DEADLINE_SEC of start-up
+        from app.deadline import Budget
+        budget = Budget(Config.DEADLINE_SEC, start=_T_START, margin=Config.DEADLINE_MARGIN_SEC)
+    out_json = run_pipeline(
+        pdf_paths, persona, job, timings,
+        on_doc    = stream.document if stream else None,
+        on_ranked = stream.ranked if stream else None,
+        budget    = budget,
+    )
+
+    if out_json is None:
         print("✗ No PDFs or no sections extracted – nothing to do.", file=sys.stderr)
         sys.exit(1)
 
-    # 3) rank sections (dense + BM25 fusion)
-    top_secs, _ = rank_sections(sections, persona, job, keep_top=15)
-
-    # 4) paragraph-level refinement per top section
-    sub_analysis = []
-    for sec in top_secs:
-        # find original section dict that still has full_text & paragraphs
-        origin = next(
-            s for s in sections
-            if s["doc_name"] == sec["document"] and s["heading"] == sec["section_title"]
-        )
-        refined = refine_section(origin, query)
-        if refined:
-            sub_analysis.append(refined)
-
-    # 5) assemble JSON
-    out_json = {
-        "metadata": {
-            "input_documents"     : sorted({s["doc_name"] for s in sections}),
-            "persona"             : persona,
-            "job_to_be_done"      : job,
-            "processing_timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
-        },
-        "extracted_sections"  : top_secs,
-        "sub_section_analysis": sub_analysis,
-    }
-
-    # 6) write result
-    result_path = OUTPUT_DIR / "result.json"
-    with open(result_path, "w", encoding="utf-8") as fh:
-        json.dump(out_json, fh, ensure_ascii=False, indent=2)
+    top_secs     = out_json["extracted_sections"]
+    sub_analysis = out_json["sub_section_analysis"]
+
+    # 3) write result
+    trace_meta = _trace_metadata()
+    if stream is not None:
+        extra = {"trace": trace_meta} if trace_meta else {}
+        if budget is not None:
+            extra["deadline"] = out_json["metadata"]["deadline"]
+        stream.refined(sub_analysis)
+        stream.close(**extra)
+        result_path = stream.path
+    else:
+        if trace_meta:
+            out_json["metadata"]["trace"] = trace_meta
+        result_path = OUTPUT_DIR / "result.json"
+        write_json(result_path, out_json)
 
     print(f"✓ Wrote {result_path}  ({len(top_secs)} sections, "
           f"{sum(len(s['subsections']) for s in sub_analysis)} paragraphs)", file=sys.stderr)
+    print(f"[startup] imports {_IMPORT_SEC:.2f}s, first section "
+          f"{timings.get('first_doc', time.perf_counter()) - _T_START:.2f}s, "
+          f"model wait {timings['model_wait']:.2f}s", file=sys.stderr)
+    if budget is not None:
+        steps = ", ".join(d["step"] for d in budget.degradations) or "none"
+        print(f"[deadline] {budget.elapsed():.2f}s of {budget.seconds:g}s, degradations: {steps}",
+              file=sys.stderr)
+    _report_embed_cache()
+    _report_trace()
+
+
+def main_batch(persona_files: list[pathlib.Path]) -> None:
+    """BATCH_PERSONAS=1: one extraction + embedding pass, one result file per persona JSON."""
+    persona_jobs = [load_persona_job(p) for p in persona_files]
+    timings: dict = {}
+    t0 = time.perf_counter()
+    results = run_batch(sorted(INPUT_DIR.glob("*.pdf")), persona_jobs, timings)
+
+    if results is None:
+        print("✗ No PDFs or no sections extracted – nothing to do.", file=sys.stderr)
+        sys.exit(1)
+
+    trace_meta = _trace_metadata()
+    for path, out_json in zip(persona_files, results):
+        if trace_meta:
+            out_json["metadata"]["trace"] = trace_meta
+        result_path = OUTPUT_DIR / f"result_{path.stem}.{Config.OUTPUT_FORMAT}"
+        if Config.OUTPUT_FORMAT == "ndjson":
+            NDJSONWriter(result_path, []).write_result(out_json)
+        else:
+            write_json(result_path, out_json)
+        print(f"✓ Wrote {result_path}  ({len(out_json['extracted_sections'])} sections, "
+              f"{sum(len(s['subsections']) for s in out_json['sub_section_analysis'])} paragraphs)",
+              file=sys.stderr)
+
+    total = time.perf_counter() - t0
+    print(f"[batch] {len(results)} personas in {total:.2f}s, first section "
+          f"{timings.get('first_doc', time.perf_counter()) - _T_START:.2f}s, "
+          f"model wait {timings['model_wait']:.2f}s", file=sys.stderr)
+    _report_embed_cache()
+    _report_trace()
+
+
+def _trace_metadata() -> dict | None:
+    """TRACE_METADATA=1: per-document stage timings + stage summary for the result metadata."""
+    if not Config.TRACE_METADATA:
+        return None
+    return {"documents": trace.doc_stats(), "stages": trace.summary()}
+
+
+def _report_trace() -> None:
+    if not trace.enabled():
+        return
+    path = trace.export_chrome(Config.TRACE_FILE or OUTPUT_DIR / "trace.json")
+    print(f"[trace] Chrome trace → {path}\n{trace.format_summary(trace.summary())}", file=sys.stderr)
+
+
+def _report_embed_cache() -> None:
+    from app.ranker import embedding_store
+    store = embedding_store()
+    if store is not None:
+        st = store.stats()
+        print(f"[embed-cache] {st['hits']} hits, {st['misses']} misses, {st['rows']} rows stored",
+              file=sys.stderr)
 
 
 # ─────────────────────────────────────────────────────────────
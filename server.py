@@ -0,0 +1,210 @@
+# server.py  – Round-1B as a long-running service (warm encoder + caches)
+#!/usr/bin/env python3
+"""
+    python server.py [--host 0.0.0.0] [--port 8080]
+    python server.py --unix /tmp/round1b.sock
+
+POST /run     {"persona": {...}, "job_to_be_done": "...",
+               "pdfs": ["/app/input/a.pdf", ...],                  # paths the server can read
+               "documents": [{"name": "b.pdf", "data": "<base64>"}]}  # and / or uploaded bytes
+              → the same result JSON main.py writes to result.json
+GET  /health  → {"status": "ok", "encoder_loaded": bool, "cached_results": n}
+
+Extraction and encoding run in a thread pool (extraction itself may fan out
+to a process pool with WORKERS=<n>); at most SERVER_CONCURRENCY requests run
+at once and model access is serialised. Identical requests (same persona,
+job and PDF bytes) are answered from an LRU of recent results.
+"""
+import argparse, asyncio, base64, binascii, hashlib, json, pathlib, sys, tempfile, threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+from app.config        import Config
+from app.parallel      import extract_many
+from app.pdf_loader    import count_pages
+from app.pipeline      import rank_and_refine
+from app.section_cache import file_sha256
+
+MAX_BODY_BYTES = 512 << 20
+_REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+            413: "Payload Too Large", 422: "Unprocessable Entity", 500: "Internal Server Error"}
+
+class RequestError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+def _json_bytes(obj) -> bytes:
+    return json.dumps(obj, ensure_ascii=False, indent=2).encode("utf-8")
+
+# ─────────────────────────────────────────────────────────────
+class Service:
+    def __init__(self, concurrency: int, cache_size: int):
+        self.slots      = asyncio.Semaphore(concurrency)
+        self.pool       = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="round1b")
+        self.model_lock = threading.Lock()          # encoder + embedding store are not re-entrant
+        self.cache_size = cache_size
+        self.results: "OrderedDict[str, bytes]" = OrderedDict()
+
+    async def _off_loop(self, fn, *args):
+        return await asyncio.get_running_loop().run_in_executor(self.pool, fn, *args)
+
+    async def warm(self) -> None:
+        from app.encoder import get_encoder
+        await self._off_loop(get_encoder)
+
+    # ── blocking work (pool threads) ─────────────────────────
+    @staticmethod
+    def _request_key(paths: List[pathlib.Path], persona: dict, job: str) -> str:
+        docs = [(p.name, file_sha256(p)) for p in paths]
+        blob = json.dumps([persona, job, docs], sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def _extract(paths: List[pathlib.Path]):
+        """extract_many(); a file that is not a readable PDF → 422 naming it."""
+        for p in paths:
+            try:
+                count_pages(str(p))
+            except Exception as exc:
+                raise RequestError(422, f"{p.name}: not a readable PDF ({type(exc).__name__})")
+        try:
+            return extract_many(paths)
+        except Exception:
+            for p in paths:                     # find the document that broke the batch
+                try:
+                    extract_many([p])
+                except Exception as exc:
+                    raise RequestError(422, f"{p.name}: extraction failed ({exc!r})")
+            raise
+
+    def _run(self, paths: List[pathlib.Path], persona: dict, job: str) -> Optional[dict]:
+        sections = self._extract(paths)
+        if not sections:
+            return None
+        with self.model_lock:
+            return rank_and_refine(sections, persona, job)
+
+    # ── request handling ─────────────────────────────────────
+    async def run(self, req: dict) -> bytes:
+        try:
+            persona, job = req["persona"], req["job_to_be_done"]
+        except (KeyError, TypeError):
+            raise RequestError(400, "expected {'persona': {...}, 'job_to_be_done': '...', 'pdfs' | 'documents': [...]}")
+        if not (isinstance(persona, dict) and isinstance(job, str)):
+            raise RequestError(400, "'persona' must be an object and 'job_to_be_done' a string")
+
+        pdfs, docs = req.get("pdfs", []), req.get("documents", [])
+        if not (isinstance(pdfs, list) and all(isinstance(p, str) for p in pdfs)):
+            raise RequestError(400, "'pdfs' must be a list of path strings")
+        if not (isinstance(docs, list) and all(isinstance(d, dict) for d in docs)):
+            raise RequestError(400, "'documents' must be a list of {'name': ..., 'data': ...} objects")
+
+        with tempfile.TemporaryDirectory(prefix="round1b-") as tmp:
+            paths = [pathlib.Path(p) for p in pdfs]
+            for doc in docs:
+                path = pathlib.Path(tmp) / pathlib.Path(str(doc.get("name", ""))).name
+                if path.suffix.lower() != ".pdf" or path.exists():
+                    raise RequestError(400, f"document names must be unique *.pdf names: {doc.get('name')!r}")
+                try:
+                    path.write_bytes(base64.b64decode(doc["data"], validate=True))
+                except (KeyError, TypeError, binascii.Error):
+                    raise RequestError(400, f"document {path.name!r}: 'data' must be base64")
+                paths.append(path)
+            missing = [str(p) for p in paths if not p.is_file()]
+            if missing:
+                raise RequestError(400, f"not found: {missing}")
+            if not paths:
+                raise RequestError(400, "no PDFs given")
+            paths.sort(key=lambda p: (p.name, str(p)))        # main.py order: sorted file names
+
+            async with self.slots:
+                key = await self._off_loop(self._request_key, paths, persona, job)
+                if key in self.results:
+                    self.results.move_to_end(key)
+                    return self.results[key]
+                result = await self._off_loop(self._run, paths, persona, job)
+
+        if result is None:
+            raise RequestError(422, "no sections extracted")
+        body = _json_bytes(result)
+        self.results[key] = body
+        while len(self.results) > self.cache_size:
+            self.results.popitem(last=False)
+        return body
+
+    async def dispatch(self, method: str, target: str, body: bytes) -> Tuple[int, bytes]:
+        path = target.split("?", 1)[0]
+        if path == "/health":
+            from app import encoder
+            return 200, _json_bytes({"status": "ok", "encoder_loaded": encoder._encoder is not None,
+                                     "cached_results": len(self.results)})
+        if path != "/run":
+            raise RequestError(404, f"unknown path {path}")
+        if method != "POST":
+            raise RequestError(405, "use POST")
+        try:
+            req = json.loads(body)
+        except ValueError:
+            raise RequestError(400, "body is not JSON")
+        return 200, await self.run(req)
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """Minimal HTTP/1.1: one request per connection, Content-Length bodies."""
+        try:
+            try:
+                method, target, _ = (await reader.readline()).decode("latin-1").split(" ", 2)
+                headers: Dict[str, str] = {}
+                while (line := await reader.readline()) not in (b"\r\n", b"\n", b""):
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                length = int(headers.get("content-length", 0))
+                if length > MAX_BODY_BYTES:
+                    raise RequestError(413, f"body over {MAX_BODY_BYTES >> 20} MB")
+                body = await reader.readexactly(length)
+                status, payload = await self.dispatch(method, target, body)
+            except RequestError as exc:
+                status, payload = exc.status, _json_bytes({"error": str(exc)})
+            except (ValueError, asyncio.IncompleteReadError) as exc:
+                status, payload = 400, _json_bytes({"error": f"malformed request: {exc}"})
+            except Exception as exc:                   # keep serving after a failed request
+                print(f"✗ request failed: {exc!r}", file=sys.stderr)
+                status, payload = 500, _json_bytes({"error": repr(exc)})
+            writer.write(
+                f"HTTP/1.1 {status} {_REASONS[status]}\r\n"
+                f"Content-Type: application/json; charset=utf-8\r\n"
+                f"Content-Length: {len(payload)}\r\nConnection: close\r\n\r\n".encode("latin-1")
+                + payload
+            )
+            await writer.drain()
+        finally:
+            writer.close()
+
+# ─────────────────────────────────────────────────────────────
+async def serve(host: str, port: int, unix: Optional[str]) -> None:
+    service = Service(Config.SERVER_CONCURRENCY, Config.SERVER_RESULT_CACHE)
+    await service.warm()
+    if unix:
+        server = await asyncio.start_unix_server(service.handle, path=unix)
+        where  = unix
+    else:
+        server = await asyncio.start_server(service.handle, host, port)
+        where  = f"http://{host}:{port}"
+    print(f"✓ Round-1B service on {where} (concurrency {Config.SERVER_CONCURRENCY})", file=sys.stderr)
+    async with server:
+        await server.serve_forever()
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Round-1B persona ranking service")
+    ap.add_argument("--host", default="0.0.0.0")
+    ap.add_argument("--port", type=int, default=8080)
+    ap.add_argument("--unix", help="listen on a Unix socket instead of TCP")
+    args = ap.parse_args()
+    try:
+        asyncio.run(serve(args.host, args.port, args.unix))
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()